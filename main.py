@@ -6,26 +6,37 @@ import sys
 import threading
 import argparse
 import shutil
+import gzip
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlencode
+from jinja2 import DictLoader
 from flask import (
    Flask,
-   render_template_string,
+   render_template,
    jsonify,
    request,
    send_from_directory,
    url_for,
    redirect,
    Response,
+   g,
 )
-from urllib.parse import unquote
 
 from templates.templates import *
 from src.taskrunner import TaskRunner
 from src.dbconnection import DbConnection
-from src.serializers import entry_to_json, source_to_json, source_and_entries_to_rss
+from src.serializers import entry_to_json, entry_to_feed_json, source_to_json, log_to_json, source_and_entries_to_rss_stream
 from src.controller import Controller
+from src.entries import Entries
+from src.sources import Sources
 from src.system import System
-from src.applogging import AppLogging
+from src.applogging import AppLogging, LogWriter
+from src.logs import Logs
+from src.responsecache import ResponseCache
+from src.rsswriter import RssWriter
+from src.exporter import Exporter
+from src.importqueue import ImportQueue
 
 
 __version__ = "0.0.0"
@@ -38,6 +49,8 @@ for line in text.split("\n"):
 
 
 page_size = 100
+rss_limit = RssWriter.default_limit
+rss_max_limit = 100000
 
 table_name = Path("data") / "table.db"
 input_name = Path("data") / "input.db"
@@ -51,6 +64,34 @@ runner = TaskRunner(table_name)
 app = Flask(__name__)
 
 
+def compile_templates():
+    """
+    Templates are compiled once, at startup. Jinja keeps compiled templates in its cache.
+    """
+    app.jinja_loader = DictLoader(get_templates())
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
+
+compile_templates()
+
+
+def get_connection():
+    """
+    Returns connection for current request. It is returned to pool on teardown.
+    """
+    if "connection" not in g:
+        g.connection = DbConnection(table_name)
+    return g.connection
+
+
+@app.teardown_appcontext
+def close_connection(exception):
+    connection = g.pop("connection", None)
+    if connection is not None:
+        connection.close()
+
+
 class PagePagination:
     def __init__(self, request):
         self.request = request
@@ -66,108 +107,107 @@ class PagePagination:
     def get_limit(self):
         return page_size
 
+    def get_cursor(self):
+        """
+        Opaque cursor of the next page. Used instead of page number, if present.
+        """
+        return self.request.args.get("cursor")
 
-def parse_search(search, table):
+    def get_links(self, next_cursor=None):
+        """
+        Returns links of pagination template
+        """
+        page = self.get_page()
+        cursor = self.get_cursor()
+
+        links = {}
+        if page > 2 or cursor:
+            links["first"] = self.get_link(p=1)
+        if page > 1 and not cursor:
+            links["prev"] = self.get_link(p=page - 1)
+        if next_cursor:
+            links["next"] = self.get_link(cursor=next_cursor)
+        return links
+
+    def get_link(self, **arguments):
+        """
+        Returns link to other page. Other query arguments, like search, are kept.
+        """
+        link_arguments = {key: value for key, value in self.request.args.items() if key not in ("p", "cursor")}
+        link_arguments.update(arguments)
+        return "?" + urlencode(link_arguments)
+
+
+def get_entries_for_request(connection, pagination, search=None):
     """
-    Supports:
-      - "keyword"                  → search all fields
-      - "title=keyword"            → search specific field
-      - URL-encoded input supported (e.g. title%3Dkeyword)
+    Returns tuple (entries, cursor of the next page)
     """
-    if not search:
-        return None
-
-    search = unquote(search).strip()
-
-    searchable_fields = {
-        "title": table.c.title,
-        "description": table.c.description,
-        "link": table.c.link,
-        "source_url": table.c.source_url,
-        "source_id": table.c.source_id,
-    }
-
-    if "=" in search:
-        field, value = search.split("=", 1)
-        field = field.strip()
-        value = value.strip()
-
-        column = searchable_fields.get(field)
-        if column is not None and value:
-            return [column.ilike(f"%{value}%")]
-
-    return [
-        table.c.title.ilike(f"%{search}%"),
-        table.c.description.ilike(f"%{search}%"),
-        table.c.link.ilike(f"%{search}%"),
-        table.c.source_url.ilike(f"%{search}%"),
-    ]
-
-
-def get_entries_for_request(connection, limit, offset, search=None):
-    table = connection.entries_table.get_table()
-    order_by = [
-      table.c.date_published.desc()
-    ]
-
-    conditions = parse_search(search, table)
-
-    if conditions:
-        entries = list(connection.entries_table.get_where(limit=limit,
-                                                          offset=offset,
-                                                          order_by=order_by,
-                                                          conditions=conditions,
-                                                          ))
-
-    elif search and search != "":
-        conditions = [
-          table.c.title.ilike(f"%{search}%"),
-          table.c.description.ilike(f"%{search}%"),
-          table.c.link.ilike(f"%{search}%"),
-          table.c.source_url.ilike(f"%{search}%"),
-        ]
-        entries = list(connection.entries_table.get_where(limit=limit,
-                                                          offset=offset,
-                                                          order_by=order_by,
-                                                          conditions=conditions,
-                                                          ))
-    else:
-        entries = list(connection.entries_table.get_where(limit=limit,
-                                                          offset=offset,
-                                                          order_by=order_by))
-    return entries
-
-
-def get_sources_for_request(connection, limit, offset, search=None):
-    table = connection.sources_table.get_table()
-
-    order_by = [
-      connection.sources_table.get_table().c.title.desc()
-    ]
-
-    if search and search != "":
-        conditions = [
-          table.c.title.ilike(f"%{search}%"),
-          table.c.url.ilike(f"%{search}%"),
-        ]
-        sources = list(connection.sources_table.get_where(limit=limit,
-                                                          offset=offset,
-                                                          order_by=order_by,
-                                                          conditions=conditions))
-    else:
-        sources = list(connection.sources_table.get_where(limit=limit,
-                                                          offset=offset,
-                                                          order_by=order_by))
-    print(f"len {sources}")
-    return sources
+    entries = Entries(connection)
+    return entries.search_page(search,
+                               limit=pagination.get_limit(),
+                               offset=pagination.get_offset(),
+                               cursor=pagination.get_cursor())
+
+
+def get_sources_for_request(connection, pagination, search=None):
+    """
+    Returns tuple (sources, cursor of the next page)
+    """
+    sources = Sources(connection)
+    return sources.search_page(search,
+                               limit=pagination.get_limit(),
+                               offset=pagination.get_offset(),
+                               cursor=pagination.get_cursor())
+
+
+def get_cached_response(compute, mimetype, *key, source_ids=None):
+    """
+    Returns response, with body computed by compute(), from response cache.
+    Cache key is request path, query arguments and key.
+    Response carries strong ETag, therefore unchanged data is answered by 304.
+    """
+    cache_key = (request.path, tuple(sorted(request.args.items(multi=True)))) + key
+
+    cache = ResponseCache.get_object()
+    body, etag = cache.get(cache_key, compute, source_ids=source_ids)
+
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def get_cached_json(compute, *key, source_ids=None):
+    return get_cached_response(lambda: jsonify(compute()).get_data(), "application/json", *key, source_ids=source_ids)
+
+
+def get_log_filters():
+    filters = {}
+    filters["level"] = request.args.get("level")
+    filters["date_from"] = request.args.get("date_from")
+    filters["date_to"] = request.args.get("date_to")
+    filters["search"] = request.args.get("search")
+    return filters
+
+
+def get_logs_for_request(connection, pagination, filters):
+    """
+    Returns tuple (logs, cursor of the next page)
+    """
+    logs = Logs(connection)
+    return logs.search_page(filters["level"],
+                            filters["date_from"],
+                            filters["date_to"],
+                            filters["search"],
+                            limit=pagination.get_limit(),
+                            offset=pagination.get_offset(),
+                            cursor=pagination.get_cursor())
 
 
 @app.route("/")
 def index():
-    connection = DbConnection(table_name)
+    connection = get_connection()
     config = connection.configurationentry.get_first()
-    html_text = get_view(INDEX_TEMPLATE, title=config.instance_title)
-    return render_template_string(html_text, version=__version__)
+    return render_template("index.html", title=config.instance_title, version=__version__)
 
 
 @app.route('/scripts/<path:filename>')
@@ -182,124 +222,194 @@ def styles(filename):
 
 @app.route("/search")
 def search():
-    connection = DbConnection(table_name)
+    connection = get_connection()
     config = connection.configurationentry.get_first()
 
     default_values = {}
     default_values["view_display_type"] = config.display_type
 
-    return render_template_string(PROJECT_TEMPLATE, title="Yafr search", default_values=default_values)
+    return render_template("project.html", title="Yafr search", default_values=default_values)
 
 
 @app.route("/sources")
 def sources():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     search = request.args.get("search")
 
     pagination = PagePagination(request)
-    limit = pagination.get_limit()
-    offset = pagination.get_offset()
-
-    page = pagination.get_page()
-    prev_page = page - 1
-    next_page = page + 1
-
-    pagination_text = "";
-    pagination_text += '<div id="pagination">'
-    pagination_text += '<nav>'
-    pagination_text += '<ul class="pagination">'
-    if page > 2:
-        pagination_text += '<a href="?p=1" class="btnNavigation page-link">|&lt;</a>';
-    if page > 1:
-        pagination_text += f'<a href="?p={prev_page}" class="btnNavigation page-link">&lt;</a>';
-    pagination_text += '<li class="page-item">'
-    pagination_text += f'<a href="?p={next_page}" class="btnNavigation page-link" >&gt;</a>';
-    pagination_text += '</li>'
-    pagination_text += '</ul>'
-    pagination_text += '</nav>'
-    pagination_text += '</div>'
+    sources, next_cursor = get_sources_for_request(connection, pagination, search)
 
     sources_len = connection.sources_table.count()
 
-    sources = get_sources_for_request(connection, limit, offset, search)
-    template_text = SOURCES_LIST_TEMPLATE
-    template_text = template_text.replace("{{pagination_text}}", pagination_text)
-    if search is None:
-        template_text = template_text.replace("{{search_value}}", "")
-    else:
-        template_text = template_text.replace("{{search_value}}", search)
-
-    html_text = get_view(template_text, title="Sources")
-
-    return render_template_string(html_text, sources=sources, sources_length=sources_len)
+    return render_template("sources.html",
+                           title="Sources",
+                           sources=sources,
+                           sources_length=sources_len,
+                           search_value=search,
+                           pagination=pagination.get_links(next_cursor))
 
 
 @app.route("/source/<int:source_id>", methods=["GET", "POST"])
 def source(source_id):
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
-    source_item = connection.sources_table.get(id=source_id)
+    sources = Sources(connection)
+    source_item = sources.get(source_id)
     source_ops = list(connection.sourceoperationaleata.get_where({"source_obj_id" : source_id}))
     source_op = None
     if len(source_ops) > 0:
         source_op = source_ops[0]
 
-    if request.method == "POST":
+    if request.method == "POST" and source_item:
+        data = {}
         data["fetch_period"] = request.form.get("fetch_period", 0)
-        data["xpath"] = request.form.get("xpath", "")
-        connection.sources_table.update_json_data(id=source_op.id, json_data=data)
-        html_text = get_view(OK_TEMPLATE, title="Updated")
-        return render_template_string(html_text)
+        data["xpath"] = request.form.get("xpath", "").strip()
+        sources.update(source_item.id, data)
+        write_stored_rss(connection, source_item.id)
+        return render_template("ok.html", title="Updated")
 
     if source_item:
-        html_text = get_view(SOURCE_TEMPLATE, title=source_item.title)
-
-        return render_template_string(html_text, source_item=source_item, source_op_data = source_op)
+        return render_template("source.html", title=source_item.title, source_item=source_item, source_op_data = source_op)
     else:
-        html_text = get_view(NOK_TEMPLATE, title="Cannot find source")
-        return render_template_string(html_text)
+        return render_template("nok.html", title="Cannot find source")
 
 
 @app.route("/add-sources", methods=["GET", "POST"])
 def add_sources():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     if request.method == "POST":
         raw_text = request.form.get("sources", "")
 
         controller = Controller(connection)
-        controller.add_sources_text(raw_text)
+        job = controller.add_sources_text(raw_text)
+        runner.wake()
 
-        template_html = STR_TEMPLATE.replace("{template_string}", "Wait until sources are added")
-        html_text = get_view(template_html, title="OK")
-        return render_template_string(html_text)
+        return render_template("import.html", title="OK", job=job)
 
-    html_text = get_view(ADD_SOURCES_TEMPLATE, title="Add sources")
-    return render_template_string(html_text, raw_data="")
+    return render_template("add_sources.html", title="Add sources", raw_data="")
 
 
 @app.route("/rss/<int:source_id>", methods=["GET", "POST"])
 def rss(source_id):
+    connection = get_connection()
+
+    source = Sources(connection).get(source_id)
+    if not source:
+        return render_template("nok.html", title="Cannot find source"), 404
+
+    limit = get_rss_limit()
+
+    if limit == rss_limit:
+        response = get_stored_rss(connection, source)
+        if response:
+            return response
+
+    return Response(get_rss_stream(source, limit), mimetype="application/rss+xml")
+
+
+def get_rss_limit():
+    limit = request.args.get("limit", default=rss_limit, type=int)
+    return min(max(limit, 1), rss_max_limit)
+
+
+def get_stored_rss(connection, source):
+    """
+    Returns response with RSS file, written when source was read.
+    File is compressed, it is sent as is, if client accepts gzip.
+    """
+    path = Sources(connection).get_rss_file_name(source)
+    try:
+        modified = path.stat().st_mtime
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return
+
+    if request.accept_encodings["gzip"]:
+        response = Response(data, mimetype="application/rss+xml")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(gzip.decompress(data), mimetype="application/rss+xml")
+
+    response.vary.add("Accept-Encoding")
+    response.last_modified = datetime.fromtimestamp(modified, timezone.utc)
+    return response.make_conditional(request)
+
+
+def write_stored_rss(connection, source_id):
+    """
+    Stored RSS is written again, when source, or its entries change outside of reading thread
+    """
+    source = Sources(connection).get(source_id)
+    if source:
+        RssWriter(connection, source).write()
+
+
+def get_rss_stream(source, limit):
+    """
+    Request connection is closed before response is streamed,
+    therefore stream uses its own connection.
+    """
     connection = DbConnection(table_name)
+    try:
+        yield from RssWriter(connection, source, limit=limit).get_rss_stream()
+    finally:
+        connection.close()
 
-    source = connection.sources_table.get(id=source_id)
-    entries = connection.entries_table.get_where({"source_id":source_id})
 
-    entry_list = []
-    for entry in entries:
-        entry_json = entry_to_json(entry)
-        entry_list.append(entry_json)
+@app.route("/rss")
+def rss_feed():
+    """
+    Combined feed of all sources, or of sources in category and subcategory
+    """
+    source_ids = get_feed_source_ids()
+    return get_cached_response(lambda: get_feed_rss(source_ids).encode("utf-8"),
+                               "application/rss+xml",
+                               source_ids=source_ids)
+
+
+@app.route("/api/feed")
+def api_feed():
+    source_ids = get_feed_source_ids()
+    return get_cached_json(lambda: get_feed_json(source_ids), source_ids=source_ids)
+
 
-    source_json = source_to_json(source)
+def get_feed_source_ids():
+    connection = get_connection()
+    sources = Sources(connection)
+    return sources.get_feed_source_ids(request.args.get("category"), request.args.get("subcategory"))
 
-    rss_text = source_and_entries_to_rss(source_json, entry_list)
-    return Response(rss_text, mimetype="application/rss+xml")
+
+def get_feed_title():
+    names = [name for name in [request.args.get("category"), request.args.get("subcategory")] if name]
+    if names:
+        return " / ".join(names)
+    return "All sources"
+
+
+def get_feed_rss(source_ids):
+    connection = get_connection()
+    entries = Entries(connection).get_merged_feed_rows(source_ids, get_rss_limit())
+    entry_jsons = (entry_to_feed_json(entry) for entry in entries)
+
+    channel_json = {"title": get_feed_title()}
+    return "".join(source_and_entries_to_rss_stream(channel_json, entry_jsons))
+
+
+def get_feed_json(source_ids):
+    connection = get_connection()
+    entries = Entries(connection).get_merged_feed_rows(source_ids, get_rss_limit())
+
+    json_data = {}
+    json_data["title"] = get_feed_title()
+    json_data["entries"] = [entry_to_feed_json(entry) for entry in entries]
+    return json_data
 
 
 @app.route("/entry-rules", methods=["GET", "POST"])
 def entry_rules():
-    connection = DbConnection(table_name)
+    connection = get_connection()
     controller = Controller(connection)
 
     if request.method == "POST":
@@ -308,94 +418,97 @@ def entry_rules():
         return redirect(url_for("index"))
 
     sources = []
-    html_text = get_view(DEFINE_ENTRY_RULES_TEMPLATE, title="Set Entry Rules")
 
     urls = controller.get_rule_urls()
     raw_data = "\n".join(urls)
-    return render_template_string(html_text, raw_data=raw_data)
+    return render_template("entry_rules.html", title="Set Entry Rules", raw_data=raw_data)
 
 
 @app.route("/remove-all-entries")
 def remove_all_entries():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
-    connection.entries_table.truncate()
+    Entries(connection).truncate()
+    RssWriter.remove_all()
 
-    html_text = get_view(OK_TEMPLATE, title="Remove all entries")
-    return render_template_string(html_text)
+    return render_template("ok.html", title="Remove all entries")
 
 
 @app.route("/remove-all-logs")
 def remove_all_logs():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     connection.applogging.truncate()
 
-    html_text = get_view(OK_TEMPLATE, title="Remove all logs")
-    return render_template_string(html_text)
+    return render_template("ok.html", title="Remove all logs")
 
 
 @app.route("/remove-all-sources")
 def remove_all_sources():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
-    connection.sources_table.truncate()
+    Sources(connection).truncate()
     connection.sourceoperationaleata.truncate()
+    RssWriter.remove_all()
 
-    html_text = get_view(OK_TEMPLATE, title="Remove all sources")
-    return render_template_string(html_text)
+    return render_template("ok.html", title="Remove all sources")
 
 
 @app.route("/remove-source")
 def remove_source():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     source_id = request.args.get("id")
 
-    source = connection.sources_table.get(id=source_id)
+    source = Sources(connection).get(source_id)
     if source:
         controller = Controller(connection)
         controller.remove_source(source)
 
-        html_text = get_view(OK_TEMPLATE, title="Remove source")
-        return render_template_string(html_text)
+        return render_template("ok.html", title="Remove source")
     else:
-        html_text = get_view(NOK_TEMPLATE, title="Remove source")
-        return render_template_string(html_text)
+        return render_template("nok.html", title="Remove source")
 
 
 @app.route("/remove-entry")
 def remove_entry():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     entry_id = request.args.get("id")
 
     entry = connection.entries_table.get(id=entry_id)
-    if source:
-        connection.entries_table.delete_where({"id" : entry.id})
+    if entry:
+        Entries(connection).delete(entry.id)
+        write_stored_rss(connection, entry.source_id)
 
-    html_text = get_view(OK_TEMPLATE, title="Remove entry")
-    return render_template_string(html_text)
+    return render_template("ok.html", title="Remove entry")
 
 
 @app.route("/logs", methods=["GET", "POST"])
 def logs():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
-    html_text = get_view(LOGS_TEMPLATE, title="Logs")
+    LogWriter.get_object().flush()
 
-    order_by = [
-            connection.applogging.get_table().c.date.desc()
-            ]
+    pagination = PagePagination(request)
+    filters = get_log_filters()
+    logs, next_cursor = get_logs_for_request(connection, pagination, filters)
 
-    logs = list(connection.applogging.get_where(order_by=order_by))
+    levels = {"All": ""}
+    for level_name in ["debug", "info", "warning", "error", "critical", "notification"]:
+        levels[level_name.capitalize()] = getattr(AppLogging, level_name.upper())
 
-    return render_template_string(html_text, logs=logs)
+    return render_template("logs.html",
+                           title="Logs",
+                           logs=logs,
+                           filters=filters,
+                           levels=levels,
+                           pagination=pagination.get_links(next_cursor))
 
 
 @app.route("/stats")
 def stats():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     entries_len = connection.entries_table.count()
     sources_len = connection.sources_table.count()
@@ -415,13 +528,12 @@ def stats():
 
     stats_map["System state"] = system.is_system_ok()
 
-    html_text = get_view(STATS_TEMPLATE, title="Stats")
-    return render_template_string(html_text, stats=stats_map)
+    return render_template("stats.html", title="Stats", stats=stats_map)
 
 
 @app.route("/configuration", methods=["GET", "POST"])
 def configuration():
-    connection = DbConnection(table_name)
+    connection = get_connection()
 
     system = System.get_object()
     config = connection.configurationentry.get_first()
@@ -444,8 +556,7 @@ def configuration():
 
         connection.configurationentry.update_json_data(id=config.id, json_data=data)
 
-        html_text = get_view(OK_TEMPLATE, title="Changes applied")
-        return render_template_string(html_text)
+        return render_template("ok.html", title="Changes applied")
 
     instance_fields = {}
     instance_fields["instance_title"] = config.instance_title
@@ -453,40 +564,49 @@ def configuration():
     instance_fields["display_type"] = config.display_type
     instance_fields["remote_webtools_server_location"] = config.remote_webtools_server_location
 
-    html_text = get_view(CONFIGURATION_TEMPLATE, title="Configuration")
-    return render_template_string(html_text, configuration=instance_fields)
+    return render_template("configuration.html", title="Configuration", configuration=instance_fields)
 
 
 #### JSON
 
 @app.route("/api/entries")
 def api_entries():
-    connection = DbConnection(table_name)
+    return get_cached_json(get_entries_json)
+
+
+def get_entries_json():
+    connection = get_connection()
 
     pagination = PagePagination(request)
-    limit = pagination.get_limit()
-    offset = pagination.get_offset()
 
     search = request.args.get("search")
 
     json_entries = []
-    entries = get_entries_for_request(connection, limit, offset, search)
+    entries, next_cursor = get_entries_for_request(connection, pagination, search)
+
+    entry_sources = Sources(connection).get_many([entry.source_id for entry in entries])
 
     for entry in entries:
         if entry.source_id:
-            entry_source = connection.sources_table.get(id=entry.source_id)
+            entry_source = entry_sources.get(entry.source_id)
             json_entry_data = entry_to_json(entry, with_id=True, source=entry_source)
             json_entries.append(json_entry_data)
 
     json_data = {}
     json_data["entries"] = json_entries
+    json_data["next"] = next_cursor
 
-    return jsonify(json_data)
+    return json_data
 
 
 @app.route("/api/stats")
 def api_stats():
-    connection = DbConnection(table_name)
+    system = System.get_object()
+    return get_cached_json(get_stats_json, system.is_system_ok())
+
+
+def get_stats_json():
+    connection = get_connection()
 
     entries_len = connection.entries_table.count()
     sources_len = connection.sources_table.count()
@@ -499,19 +619,21 @@ def api_stats():
     stats_map["sources_len"] = sources_len
     stats_map["system_state"] = system.is_system_ok()
 
-    return jsonify(stats_map)
+    return stats_map
 
 
 @app.route("/api/sources")
 def api_sources():
-    connection = DbConnection(table_name)
+    return get_cached_json(get_sources_json)
+
+
+def get_sources_json():
+    connection = get_connection()
 
     pagination = PagePagination(request)
-    limit = pagination.get_limit()
-    offset = pagination.get_offset()
 
     json_sources = []
-    sources = get_sources_for_request(connection, limit, offset)
+    sources, next_cursor = get_sources_for_request(connection, pagination)
 
     for source in sources:
         json_data_source = source_to_json(source, with_id=True)
@@ -519,10 +641,36 @@ def api_sources():
 
     json_data = {}
     json_data["sources"] = json_sources
+    json_data["next"] = next_cursor
+
+    return json_data
+
+
+@app.route("/api/logs")
+def api_logs():
+    connection = get_connection()
+
+    LogWriter.get_object().flush()
+
+    pagination = PagePagination(request)
+    logs, next_cursor = get_logs_for_request(connection, pagination, get_log_filters())
+
+    json_data = {}
+    json_data["logs"] = [log_to_json(log) for log in logs]
+    json_data["next"] = next_cursor
 
     return jsonify(json_data)
 
 
+@app.route("/api/import/<int:job_id>")
+def api_import(job_id):
+    job = ImportQueue.get_object().get_job(job_id)
+    if not job:
+        return jsonify({"error": "Cannot find import"}), 404
+
+    return jsonify(job.to_json())
+
+
 def print_file(afile):
     path = Path(afile)
     text = path.read_text()
@@ -549,6 +697,23 @@ def parse_args():
         action="store_true",
         help="Run Flask in debug mode"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=5,
+        help="Number of concurrent source fetches, and export workers (default: 5)"
+    )
+    parser.add_argument(
+        "--max-entries",
+        type=int,
+        default=None,
+        help="Global limit of stored entries. The oldest are removed (default: no limit)"
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="Export static HTML pages of changed sources, then exit"
+    )
     return parser.parse_args()
 
 
@@ -558,6 +723,20 @@ if __name__ == "__main__":
     args = parse_args()
     debug_mode = args.debug
 
+    runner.workers = max(args.workers, 1)
+    if "YAFR_WORKERS" in os.environ:
+        runner.workers = max(int(os.environ["YAFR_WORKERS"]), 1)
+
+    runner.max_entries = args.max_entries
+    if "YAFR_MAX_ENTRIES" in os.environ:
+        runner.max_entries = int(os.environ["YAFR_MAX_ENTRIES"])
+
+    if args.export:
+        exporter = Exporter(table_name, workers=runner.workers)
+        written, removed = exporter.export()
+        print(f"Exported sources: {written}, removed: {removed}")
+        sys.exit(0)
+
     if (debug_mode and os.environ.get("WERKZEUG_RUN_MAIN") == "true") or not debug_mode:
         thread = threading.Thread(
             target=runner.start,
@@ -1,4 +1,13 @@
+import time
+import queue
+import atexit
+import threading
+import traceback
 from datetime import datetime
+from sqlalchemy import select, insert, delete
+
+from .dbconnection import DbConnection
+
 
 class AppLogging(object):
     DEBUG = 10
@@ -8,10 +17,15 @@ class AppLogging(object):
     CRITICAL = 50
     NOTIFICATION = 60
 
+    max_log_entries = 2000
+
     def __init__(self, connection):
         self.connection = connection
 
     def create_entry(self, info_text, detail_text="", level=INFO, stack=False):
+        """
+        Entry is queued, it is written by log writer thread
+        """
         if len(info_text) > 1900:
             info_text = info_text[:1900]
         if len(detail_text) > 2900:
@@ -23,24 +37,29 @@ class AppLogging(object):
         json_data["level"] = level
         json_data["date"] = datetime.now()
 
-        self.connection.applogging.insert_json_data(json_data)
+        if self.connection is None:
+            print(info_text)
+            return
 
-        self.cleanup_overflow()
+        LogWriter.get_object().add(self.connection.db_file, json_data)
 
     def cleanup_overflow(self):
         """
-        Cleans up
+        Removes the oldest entries, over the limit, by one ranged delete
         """
-        count_elements = self.connection.applogging.count()
-        if count_elements > AppLogging.get_max_log_entries():
-            diff = count_elements - AppLogging.get_max_log_entries()
+        table = self.connection.applogging.get_table()
 
-            rows = self.connection.applogging.get_where(order_by=[self.connection.applogging.get_table().c.date.asc()], limit=diff)
-            for row in rows:
-                self.connection.applogging.delete(id=row.id)
+        boundary = (
+            select(table.c.id)
+            .order_by(table.c.id.desc())
+            .limit(1)
+            .offset(AppLogging.get_max_log_entries())
+            .scalar_subquery()
+        )
+        self.connection.connection.execute(delete(table).where(table.c.id <= boundary))
 
     def get_max_log_entries():
-        return 2000
+        return AppLogging.max_log_entries
 
     def debug(self, info_text, detail_text="", stack=False):
         print(info_text)
@@ -61,3 +80,102 @@ class AppLogging(object):
         info_text += str(exception)
 
         self.create_entry(info_text, detail_text=detail_text, level=AppLogging.ERROR, stack=stack)
+
+
+class LogWriter(object):
+    """
+    Writes queued log entries in batches, from background thread.
+    Each batch is one transaction: insert of all entries, and one retention delete.
+    """
+    instance = None
+
+    def __init__(self, batch_size=500, flush_interval_s=1.0, background=True):
+        """
+        Without background thread entries are written only by flush()
+        """
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.background = background
+        self.queue = queue.Queue()
+        self.queued_event = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+    def get_object():
+        if LogWriter.instance is None:
+            LogWriter.instance = LogWriter()
+            atexit.register(LogWriter.instance.flush)
+        return LogWriter.instance
+
+    def add(self, db_file, json_data):
+        self.queue.put((str(db_file), json_data))
+        self.queued_event.set()
+        self.start()
+
+    def start(self):
+        if self.thread is not None or not self.background:
+            return
+
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="logwriter", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.queued_event.wait()
+            self.queued_event.clear()
+
+            # entries which come shortly after the first one go into the same batch
+            time.sleep(self.flush_interval_s)
+
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all queued entries. Can be called from any thread.
+        Entries stay in queue until they are written, therefore when flush
+        returns, all entries added before it are in the database.
+        """
+        with self.write_lock:
+            while True:
+                items = self.get_items(self.batch_size)
+                if not items:
+                    return
+                self.write_items(items)
+
+    def get_items(self, limit):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def write_items(self, items):
+        batches = {}
+        for db_file, json_data in items:
+            batches.setdefault(db_file, []).append(json_data)
+
+        for db_file, rows in batches.items():
+            try:
+                self.write(db_file, rows)
+            except Exception:
+                traceback.print_exc()
+
+    def write(self, db_file, rows):
+        connection = DbConnection(db_file)
+        try:
+            table = connection.applogging.get_table()
+            connection.connection.execute(insert(table), rows)
+
+            AppLogging(connection).cleanup_overflow()
+
+            connection.connection.commit()
+        except Exception:
+            connection.connection.rollback()
+            raise
+        finally:
+            connection.close()
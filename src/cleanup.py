@@ -0,0 +1,34 @@
+from sqlalchemy import select, delete, or_
+
+
+def delete_orphans(connection, table, foreign_key, parent_table, chunk_size=1000):
+    """
+    Deletes rows of table, which foreign_key column does not point to any row of parent table.
+
+    Rows are deleted in chunks, each in own transaction. Chunks are read in id order,
+    each one continues after the previous one, therefore table is scanned only once.
+    Returns number of deleted rows.
+    """
+    column = table.c[foreign_key]
+    is_orphan = or_(column.is_(None), column.not_in(select(parent_table.c.id)))
+
+    removed = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(table.c.id)
+            .where(table.c.id > last_id, is_orphan)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        )
+        ids = [row.id for row in connection.execute(stmt)]
+        if not ids:
+            break
+
+        connection.execute(delete(table).where(table.c.id.in_(ids)))
+        connection.commit()
+
+        removed += len(ids)
+        last_id = ids[-1]
+
+    return removed
@@ -1,7 +1,10 @@
-from pathlib import Path
 from datetime import datetime
 from .sourcedata import SourceData
 from .sources import Sources
+from .entries import Entries
+from .rsswriter import RssWriter
+from .entryrules import EntryRules, TEXT_RULE_PREFIX
+from .importqueue import ImportQueue, ImportJob
 
 
 def read_line_things(input_text):
@@ -11,8 +14,7 @@ def read_line_things(input_text):
         if line.strip()
     ]
 
-    sources = set(sources)
-    sources = list(sources)
+    sources = list(dict.fromkeys(sources))
 
     return sources
 
@@ -21,36 +23,45 @@ class Controller(object):
     def __init__(self, connection):
         self.connection = connection
 
-    def add_sources(self, sources):
-        self.start_reading = True
-
-        for source_url in sources:
-            if not self.is_entry_rule_triggered(source_url):
-                sources = Sources(self.connection)
-                sources.set(source_url)
-
     def add_sources_text(self, raw_text):
-        # write raw_text to file
-        output_path = Path("sources.txt")
-        with output_path.open("a", encoding="utf-8", errors="ignore") as f:
-            f.write("\n")
-            f.write(raw_text)
-
-    def get_sources_to_add(self):
-        output_path = Path("sources.txt")
-        if output_path.exists():
-            raw_text = output_path.read_text(encoding="utf-8")
-            if raw_text:
-                sources = read_line_things(raw_text)
-                output_path.unlink()
-                return sources
+        """
+        Queues import of sources. Returns import job, sources are added by runner thread.
+        """
+        return ImportQueue.get_object().add(read_line_things(raw_text))
+
+    def run_import(self, job):
+        """
+        Adds sources of import job, chunk by chunk. Returns ids of added sources.
+        """
+        job.status = ImportJob.RUNNING
+
+        source_ids = []
+        try:
+            for urls in job.get_chunks(ImportQueue.get_object().chunk_size):
+                allowed_urls = [url for url in urls if not self.is_entry_rule_triggered(url)]
+                added_ids = Sources(self.connection).add_many(allowed_urls)
+
+                job.blocked += len(urls) - len(allowed_urls)
+                job.existing += len(allowed_urls) - len(added_ids)
+                job.added += len(added_ids)
+                job.processed += len(urls)
+
+                source_ids.extend(added_ids)
+        except Exception as E:
+            job.set_done(error=str(E))
+            return source_ids
+
+        job.set_done()
+        return source_ids
 
     def is_entry_rule_triggered(self, url) -> bool:
-        rules = self.connection.entry_rules.get_where({"trigger_rule_url" : url})
-        rules = next(rules, None)
-        if rules:
-            return True
-        return False
+        return EntryRules.get_matcher(self.connection).is_url_triggered(url)
+
+    def is_entry_triggered(self, entry) -> bool:
+        """
+        Entry is map of entry properties, like link, title, description
+        """
+        return EntryRules.get_matcher(self.connection).is_entry_triggered(entry)
 
     def add_entry_rules(self, raw_input):
         self.connection.entry_rules.truncate()
@@ -59,26 +70,45 @@ class Controller(object):
         for entry_rule_url in entry_rule_urls:
             self.add_entry_rule(entry_rule_url)
 
+        EntryRules.invalidate(self.connection.db_file)
+
     def get_rule_urls(self):
         urls = []
 
         rules = self.connection.entry_rules.get_where(limit=10000)
         for rule in rules:
-            urls.append(rule.trigger_rule_url)
+            if rule.trigger_text:
+                urls.append(TEXT_RULE_PREFIX + rule.trigger_text)
+            else:
+                urls.append(rule.trigger_rule_url)
 
         return urls
 
     def add_entry_rule(self, entry_rule):
-        entries = self.connection.entry_rules.get_where({"trigger_rule_url" : entry_rule})
+        """
+        Rule is URL, URL prefix ending with '*', host name, or text to find in entries, prefixed with 'text:'
+        """
+        trigger_rule_url = entry_rule
+        trigger_text = ""
+        conditions_map = {"trigger_rule_url" : trigger_rule_url}
+
+        if entry_rule.startswith(TEXT_RULE_PREFIX):
+            trigger_rule_url = ""
+            trigger_text = entry_rule[len(TEXT_RULE_PREFIX):].strip()
+            if not trigger_text:
+                return
+            conditions_map = {"trigger_text" : trigger_text}
+
+        entries = self.connection.entry_rules.get_where(conditions_map)
         entry = next(entries, None)
 
         if not entry:
             data = {}
-            data["trigger_rule_url"] = entry_rule
+            data["trigger_rule_url"] = trigger_rule_url
             data["enabled"] = True
             data["priority"] = 0
             data["rule_name"] = entry_rule
-            data["trigger_text"] = ""
+            data["trigger_text"] = trigger_text
             data["trigger_text_hits"] = 0
             data["trigger_text_fields"] = ""
             data["block"] = True
@@ -88,10 +118,16 @@ class Controller(object):
             data["browser_id"] = 0
 
             self.connection.entry_rules.insert_json_data(data)
+            EntryRules.invalidate(self.connection.db_file)
+
+    def remove_source(self, source):
+        sources = Sources(self.connection)
+        sources.delete(id=source.id)
 
     def truncate(self):
-        self.connection.entries_table.truncate()
-        self.connection.sources_table.truncate()
+        Entries(self.connection).truncate()
+        Sources(self.connection).truncate()
+        RssWriter.remove_all()
 
     def print(self):
         for entry in self.connection.entries_table.get_entries():
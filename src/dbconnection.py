@@ -1,5 +1,9 @@
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy import (
+    MetaData,
+    Table,
+    event,
     text,
 )
 
@@ -13,8 +17,66 @@ from linkarchivetools.utils.reflected import (
    ReflectedGenericTable,
 )
 
+from .sourcecache import SourceCache
+from .responsecache import ResponseCache
+
+
+def on_connect(dbapi_connection, connection_record):
+    """
+    Called once for each new pooled connection
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL;")
+    cursor.close()
+
 
 class DbConnection(object):
+    """
+    Columns, which are not part of the original schema.
+    They are added once per process, when database is opened.
+    """
+    added_columns = {
+        "sourceoperationaldata": {
+            "etag": "VARCHAR(1000)",
+            "last_modified": "VARCHAR(1000)",
+        },
+    }
+
+    # Indexes, which are not part of the original schema.
+    # Map of index name to (table name, columns, unique).
+    # Duplicates are removed, before unique index is created. See duplicate_order.
+    added_indexes = {
+        "idx_linkdatamodel_link_unique": ("linkdatamodel", ["link"], True),
+        "idx_linkdatamodel_date_published_id": ("linkdatamodel", ["date_published", "id"], False),
+        "idx_linkdatamodel_source_id_date_published_id": ("linkdatamodel", ["source_id", "date_published", "id"], False),
+        "idx_sourcedatamodel_title_id": ("sourcedatamodel", ["title", "id"], False),
+        "idx_sourcedatamodel_url": ("sourcedatamodel", ["url"], False),
+        "idx_applogging_date_level": ("applogging", ["date", "level"], False),
+    }
+
+    # Order of rows, in a group of duplicates. The first row is kept, by default the oldest one.
+    # Bookmarked and permanent entries are never removed in favor of an unmarked copy.
+    duplicate_order = {
+        "linkdatamodel": "bookmarked DESC, permanent DESC, id ASC",
+    }
+
+    # Full text search index over entries, kept in sync by triggers
+    search_index_name = "linkdatamodel_fts"
+    search_index_columns = ["title", "description", "link", "source_url"]
+    search_index_files = set()
+
+    upgraded_files = set()
+    upgrade_lock = threading.Lock()
+
+    # Engines are shared by the whole process, one for each database file
+    engines = {}
+    engines_lock = threading.Lock()
+
+    # Reflected schema, shared by the whole process.
+    # Map of database file to map of table name to Table.
+    tables = {}
+    tables_lock = threading.Lock()
+
     def __init__(self, db_file):
         self.db_file = db_file
 
@@ -22,9 +84,7 @@ class DbConnection(object):
 
         self.connection = self.engine.connect()
 
-        sql_text = f"PRAGMA journal_mode=WAL;"
-        self.connection.execute(text(sql_text))
-        self.connection.commit()
+        self.upgrade_schema()
 
         self.entries_table = ReflectedEntryTable(engine=self.engine, connection=self.connection)
         self.sources_table = ReflectedSourceTable(engine=self.engine, connection=self.connection)
@@ -33,13 +93,160 @@ class DbConnection(object):
         self.sourceoperationaleata = ReflectedSourceOperationalData(engine=self.engine, connection=self.connection)
         self.applogging = ReflectedGenericTable(engine=self.engine, connection=self.connection, table_name="applogging")
 
+        for reflected in [self.entries_table,
+                          self.sources_table,
+                          self.entry_rules,
+                          self.configurationentry,
+                          self.sourceoperationaleata,
+                          self.applogging]:
+            reflected.table = self.get_reflected_table(reflected.table_name)
+
+    def get_reflected_table(self, table_name):
+        """
+        Table metadata is reflected only once per process
+        """
+        with DbConnection.tables_lock:
+            tables = DbConnection.tables.setdefault(str(self.db_file), {})
+
+            table = tables.get(table_name)
+            if table is None:
+                table = Table(table_name, MetaData(), autoload_with=self.engine)
+                tables[table_name] = table
+
+            return table
+
+    def refresh_schema(db_file=None):
+        """
+        Should be called when schema changes. Tables are reflected again, on next use.
+        """
+        with DbConnection.tables_lock:
+            if db_file is None:
+                DbConnection.tables = {}
+            else:
+                DbConnection.tables.pop(str(db_file), None)
+
+    def upgrade_schema(self):
+        with DbConnection.upgrade_lock:
+            if str(self.db_file) in DbConnection.upgraded_files:
+                return
+
+            table = ReflectedTable(engine=self.engine, connection=self.connection)
+            for table_name, columns in DbConnection.added_columns.items():
+                existing_columns = table.get_column_names(table_name)
+                for column_name, column_type in columns.items():
+                    if column_name not in existing_columns:
+                        table.run_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};")
+
+            existing_indexes = self.get_index_names()
+            for index_name, (table_name, columns, unique) in DbConnection.added_indexes.items():
+                if index_name in existing_indexes:
+                    continue
+
+                columns_text = ", ".join(columns)
+                if unique:
+                    self.remove_duplicates(table_name, columns)
+                    table.run_sql(f"CREATE UNIQUE INDEX {index_name} ON {table_name} ({columns_text});")
+                else:
+                    table.run_sql(f"CREATE INDEX {index_name} ON {table_name} ({columns_text});")
+
+            self.create_search_index()
+
+            DbConnection.upgraded_files.add(str(self.db_file))
+
+        DbConnection.refresh_schema(self.db_file)
+
+    def remove_duplicates(self, table_name, columns):
+        """
+        Removes rows with the same values of columns. Returns number of removed rows.
+        """
+        columns_text = ", ".join(columns)
+        order_text = DbConnection.duplicate_order.get(table_name, "id ASC")
+        not_null_text = " AND ".join(f"{column} IS NOT NULL" for column in columns)
+
+        duplicates = (
+            f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {columns_text} ORDER BY {order_text}) AS position "
+            f"FROM {table_name} WHERE {not_null_text}) WHERE position > 1"
+        )
+
+        count = self.connection.execute(text(f"SELECT COUNT(*) FROM ({duplicates});")).scalar()
+        if count:
+            print(f"Removing {count} duplicate rows of {table_name}, before creating unique index on {columns_text}")
+
+            table = ReflectedTable(engine=self.engine, connection=self.connection)
+            table.run_sql(f"DELETE FROM {table_name} WHERE id IN ({duplicates});")
+
+        return count
+
+    def create_search_index(self):
+        """
+        Creates FTS5 table over entries, if SQLite supports it.
+        Without it search falls back to LIKE queries.
+        """
+        index_name = DbConnection.search_index_name
+        columns = DbConnection.search_index_columns
+
+        table = ReflectedTable(engine=self.engine, connection=self.connection)
+        if index_name in table.get_table_names():
+            DbConnection.search_index_files.add(str(self.db_file))
+            return
+
+        columns_text = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+
+        try:
+            table.run_sql(f"CREATE VIRTUAL TABLE {index_name} USING fts5({columns_text}, content='linkdatamodel', content_rowid='id');")
+        except Exception as E:
+            self.connection.rollback()
+            print(f"Full text search is not available: {E}")
+            return
+
+        table.run_sql(f"""CREATE TRIGGER {index_name}_ai AFTER INSERT ON linkdatamodel BEGIN
+            INSERT INTO {index_name}(rowid, {columns_text}) VALUES (new.id, {new_values});
+        END;""")
+        table.run_sql(f"""CREATE TRIGGER {index_name}_ad AFTER DELETE ON linkdatamodel BEGIN
+            INSERT INTO {index_name}({index_name}, rowid, {columns_text}) VALUES ('delete', old.id, {old_values});
+        END;""")
+        table.run_sql(f"""CREATE TRIGGER {index_name}_au AFTER UPDATE ON linkdatamodel BEGIN
+            INSERT INTO {index_name}({index_name}, rowid, {columns_text}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {index_name}(rowid, {columns_text}) VALUES (new.id, {new_values});
+        END;""")
+        table.run_sql(f"INSERT INTO {index_name}({index_name}) VALUES ('rebuild');")
+
+        DbConnection.search_index_files.add(str(self.db_file))
+
+    def is_search_index(self):
+        return str(self.db_file) in DbConnection.search_index_files
+
+    def get_index_names(self):
+        rows = self.connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index';"))
+        return set(row.name for row in rows)
+
     def create_engine(db_file):
-        engine = create_engine(f"sqlite:///{db_file}", connect_args={"check_same_thread": False})
-        return engine
+        """
+        Returns engine, with connection pool, for the database file.
+        Engine is created only once.
+        """
+        with DbConnection.engines_lock:
+            engine = DbConnection.engines.get(str(db_file))
+            if engine is None:
+                engine = create_engine(f"sqlite:///{db_file}", connect_args={"check_same_thread": False})
+                event.listen(engine, "connect", on_connect)
+                DbConnection.engines[str(db_file)] = engine
+
+            return engine
+
+    def dispose_engines():
+        with DbConnection.engines_lock:
+            for engine in DbConnection.engines.values():
+                engine.dispose()
+            DbConnection.engines = {}
 
     def truncate(self):
         self.entries_table.truncate()
         self.sources_table.truncate()
+        SourceCache.get_object().clear(self.db_file)
+        ResponseCache.get_object().bump()
 
         table = ReflectedTable(engine=self.engine, connection=self.connection)
         table.vacuum()
@@ -1,14 +1,90 @@
+import heapq
+from itertools import islice
 from datetime import datetime
+from urllib.parse import unquote
+from sqlalchemy import select, union_all, or_, column, literal_column, table as table_clause
+from sqlalchemy.dialects.sqlite import insert
+
+from .responsecache import ResponseCache
+from .cleanup import delete_orphans
+from .retention import Retention
+from .pagination import paginate, get_page
+
+
+def is_value_changed(stored_value, new_value):
+    """
+    SQLite does not store time zone, therefore aware dates are compared as naive
+    """
+    if isinstance(new_value, datetime) and new_value.tzinfo is not None:
+        new_value = new_value.replace(tzinfo=None)
+
+    return stored_value != new_value
+
+
+def parse_search(search):
+    """
+    Supports:
+      - "keyword"                  → search all fields
+      - "title=keyword"            → search specific field
+      - URL-encoded input supported (e.g. title%3Dkeyword)
+
+    Returns tuple (field, value). Field is None, if all fields should be searched.
+    """
+    if not search:
+        return None, None
+
+    search = unquote(search).strip()
+
+    if "=" in search:
+        field, value = search.split("=", 1)
+        field = field.strip()
+        value = value.strip()
+
+        if field in Entries.searchable_fields and value:
+            return field, value
+
+    return None, search
+
+
+def get_match_query(value, field=None):
+    """
+    Returns FTS5 query. Every word is matched as prefix, all words have to match.
+    """
+    phrases = []
+    for word in value.split():
+        word = word.replace('"', '""')
+        phrase = f'"{word}"*'
+        if field:
+            phrase = f"{field} : {phrase}"
+        phrases.append(phrase)
+
+    return " AND ".join(phrases)
+
+
+def get_feed_key(row):
+    """
+    Sort key of feed rows. Descending order matches order of get_feed_rows,
+    entries without publish date are last.
+    """
+    date_published = row.date_published
+    return (date_published is not None, date_published or datetime.min, row.id)
 
 
 class Entries(object):
+    """
+    Fields which are not compared, when fetched entry is compared with stored one
+    """
+    not_synced_fields = ("date_created", "date_update_last", "source_url", "source_id")
+
+    # Columns, which are needed to write RSS item
+    feed_fields = ("id", "source_id", "title", "link", "description", "date_published", "thumbnail")
+
+    searchable_fields = ("title", "description", "link", "source_url", "source_id")
+
     def __init__(self, connection):
         self.connection = connection
 
-    def add(self, entry_json, source):
-        if self.connection.entries_table.exists(link=entry_json["link"]):
-            return
-
+    def prepare_entry_json(self, entry_json, source):
         entry_json["source_url"] = source.url
 
         if "source" in entry_json:
@@ -20,32 +96,300 @@ class Entries(object):
         if "tags" in entry_json:
             del entry_json["tags"]
 
-        entry_json["date_created"] = datetime.now()
         entry_json["source_id"] = source.id
 
+        return entry_json
+
+    def add(self, entry_json, source):
+        self.add_many([entry_json], source)
+
+    def add_many(self, entry_jsons, source):
+        """
+        Writes entries in one transaction.
+        Relies on unique index on link. New links are inserted, existing rows are
+        updated only if any of fetched fields changed.
+        """
+        table = self.connection.entries_table.get_table()
+        now = datetime.now()
+
+        # executemany requires the same keys in all rows
+        groups = {}
+        for entry_json in entry_jsons:
+            entry_json = self.prepare_entry_json(entry_json, source)
+            keys = tuple(sorted(key for key in entry_json if key in table.c))
+            groups.setdefault(keys, []).append(entry_json)
+
         try:
-            self.connection.entries_table.insert_json(entry_json)
+            for keys, rows in groups.items():
+                rows = [self.get_insert_row(row, keys, now) for row in rows]
+
+                stmt = insert(table)
+
+                synced_columns = [key for key in keys if key != "link" and key not in Entries.not_synced_fields]
+                update_data = {key: stmt.excluded[key] for key in synced_columns}
+                update_data["date_update_last"] = now
+
+                if synced_columns:
+                    changed = or_(*[table.c[key].is_distinct_from(stmt.excluded[key]) for key in synced_columns])
+                    stmt = stmt.on_conflict_do_update(index_elements=[table.c.link], set_=update_data, where=changed)
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.link])
+
+                self.connection.connection.execute(stmt, rows)
+
+            self.connection.connection.commit()
         except Exception as E:
+            self.connection.connection.rollback()
             print(E)
-            print(entry_json)
             raise
 
+        if groups:
+            ResponseCache.get_object().bump(source.id)
+
+    def get_insert_row(self, entry_json, keys, now):
+        row = {key: entry_json[key] for key in keys}
+        row["date_created"] = now
+
+        if not row.get("source_url"):
+            row["source_url"] = ""
+        if row.get("permanent") is None:
+            row["permanent"] = False
+        if row.get("bookmarked") is None:
+            row["bookmarked"] = False
+        if row.get("status_code") is None:
+            row["status_code"] = 0
+        if row.get("contents_type") is None:
+            row["contents_type"] = 0
+        if row.get("page_rating_contents") is None:
+            row["page_rating_contents"] = 0
+        if row.get("page_rating_visits") is None:
+            row["page_rating_visits"] = 0
+        if row.get("page_rating_votes") is None:
+            row["page_rating_votes"] = 0
+        if row.get("page_rating") is None:
+            row["page_rating"] = 0
+
+        return row
+
+    def sync(self, entry_jsons, source):
+        """
+        Compares fetched entries with stored ones, by link.
+        New links are inserted, changed rows are updated, unchanged rows are not touched.
+
+        Entries, which would be removed by retention, are not inserted again.
+
+        Returns tuple (number of inserted, number of updated)
+        """
+        entry_jsons = [self.prepare_entry_json(entry_json, source) for entry_json in entry_jsons]
+        date_limit = Retention.get_date_limit(source)
+        links = [entry_json["link"] for entry_json in entry_jsons]
+        stored_entries = self.get_by_links(links)
+
+        new_entries = []
+        changed_entries = []
+
+        for entry_json in entry_jsons:
+            stored_entry = stored_entries.get(entry_json["link"])
+
+            if stored_entry is None:
+                if Retention.is_expired(entry_json, date_limit):
+                    continue
+                stored_entries[entry_json["link"]] = entry_json
+                new_entries.append(entry_json)
+            elif isinstance(stored_entry, dict):
+                # duplicate link in the same feed
+                continue
+            elif self.get_changed_fields(stored_entry, entry_json):
+                changed_entries.append(entry_json)
+
+        if new_entries or changed_entries:
+            self.add_many(new_entries + changed_entries, source)
+
+        return len(new_entries), len(changed_entries)
+
+    def get_changed_fields(self, stored_entry, entry_json):
+        changed_fields = {}
+
+        stored_data = stored_entry._mapping
+        for key, value in entry_json.items():
+            if key in Entries.not_synced_fields or key not in stored_data:
+                continue
+
+            if is_value_changed(stored_data[key], value):
+                changed_fields[key] = value
+
+        return changed_fields
+
+    def get_by_links(self, links, chunk_size=500):
+        """
+        Returns map of link to stored entry
+        """
+        table = self.connection.entries_table.get_table()
+
+        stored_entries = {}
+        for index in range(0, len(links), chunk_size):
+            chunk = links[index:index + chunk_size]
+
+            stmt = select(table).where(table.c.link.in_(chunk))
+            for row in self.connection.connection.execute(stmt):
+                stored_entries[row.link] = row
+
+        return stored_entries
+
+    def search(self, search=None, limit=None, offset=0, cursor=None):
+        """
+        Returns entries, newest first.
+        Text search uses full text index, then results are ranked by relevance.
+
+        Ranked results support only offset, not cursor.
+        """
+        table = self.connection.entries_table.get_table()
+
+        stmt = select(table)
+        order_columns = self.get_order_columns()
+        order_by = [order_column.desc() for order_column in order_columns]
+
+        field, value = parse_search(search)
+        if value:
+            if field == "source_id":
+                stmt = stmt.where(table.c.source_id == value)
+            elif self.connection.is_search_index():
+                index = table_clause(self.connection.search_index_name, column("rowid"), column("rank"))
+                query = get_match_query(value, field)
+
+                stmt = stmt.join(index, index.c.rowid == table.c.id)
+                stmt = stmt.where(literal_column(self.connection.search_index_name).op("MATCH")(query))
+                order_by = [index.c.rank] + order_by
+                cursor = None
+            else:
+                fields = [field] if field else Entries.searchable_fields[:-1]
+                stmt = stmt.where(or_(*[table.c[name].ilike(f"%{value}%") for name in fields]))
+
+        return paginate(self.connection.connection, stmt, order_columns, limit, offset, cursor, order_by)
+
+    def search_page(self, search=None, limit=None, offset=0, cursor=None):
+        """
+        Returns tuple (entries, cursor of the next page).
+        Next cursor is None for the last page, and for ranked text search.
+        """
+        entries = self.search(search, limit=limit, offset=offset, cursor=cursor)
+        entries, next_cursor = get_page(entries, self.get_order_columns(), limit)
+        if self.is_ranked(search):
+            next_cursor = None
+
+        return entries, next_cursor
+
+    def get_feed_rows(self, source_id, limit=None, chunk_size=500):
+        """
+        Yields newest entries of source, with feed columns only.
+        Rows are fetched from the cursor in chunks, they are not read into a list.
+        """
+        table = self.connection.entries_table.get_table()
+
+        stmt = (
+            select(*[table.c[name] for name in Entries.feed_fields])
+            .where(table.c.source_id == source_id)
+            .order_by(table.c.date_published.desc(), table.c.id.desc())
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        result = self.connection.connection.execution_options(yield_per=chunk_size).execute(stmt)
+        try:
+            for row in result:
+                yield row
+        finally:
+            result.close()
+
+    def get_merged_feed_rows(self, source_ids, limit, chunk_size=500, batch_size=200):
+        """
+        Yields newest entries of many sources, in the same order as get_feed_rows.
+        Sources are read in batches, by one query each, and sorted batches are merged,
+        therefore only the head of each batch is read past the output.
+        """
+        source_ids = list(source_ids)
+        batches = [
+            self.get_batch_feed_rows(source_ids[index:index + batch_size], limit, chunk_size)
+            for index in range(0, len(source_ids), batch_size)
+        ]
+
+        try:
+            merged = heapq.merge(*batches, key=get_feed_key, reverse=True)
+            for row in islice(merged, limit):
+                yield row
+        finally:
+            for batch in batches:
+                batch.close()
+
+    def get_batch_feed_rows(self, source_ids, limit, chunk_size=500):
+        """
+        Yields newest entries of a batch of sources, by one query.
+        Each source gives at most limit rows, read from (source_id, date_published, id) index,
+        only these rows are sorted.
+        """
+        table = self.connection.entries_table.get_table()
+        columns = [table.c[name] for name in Entries.feed_fields]
+
+        newest = []
+        for source_id in source_ids:
+            source_rows = (
+                select(*columns)
+                .where(table.c.source_id == source_id)
+                .order_by(table.c.date_published.desc(), table.c.id.desc())
+                .limit(limit)
+                .subquery()
+            )
+            newest.append(select(source_rows))
+
+        rows = union_all(*newest).subquery()
+        stmt = (
+            select(rows)
+            .order_by(rows.c.date_published.desc(), rows.c.id.desc())
+            .limit(limit)
+        )
+
+        result = self.connection.connection.execution_options(yield_per=min(limit, chunk_size)).execute(stmt)
+        try:
+            for row in result:
+                yield row
+        finally:
+            result.close()
+
+    def is_ranked(self, search):
+        field, value = parse_search(search)
+        return bool(value) and field != "source_id" and self.connection.is_search_index()
+
+    def get_order_columns(self):
+        table = self.connection.entries_table.get_table()
+        return [table.c.date_published, table.c.id]
+
     def count(self):
         return self.connection.entries_table.count()
 
     def delete(self, id):
         self.connection.entries_table.delete(id=id)
+        ResponseCache.get_object().bump()
+
+    def truncate(self):
+        self.connection.entries_table.truncate()
+        ResponseCache.get_object().bump()
 
     def get(self,id):
         return self.connection.entries_table.get(id=id)
 
-    def cleanup(self):
-        ids_to_remove = set()
-        for entry in self.connection.entries_table.get_where():
-            if not self.connection.sources_table.get(id=entry.source_id):
-                ids_to_remove.add(entry.id)
+    def cleanup(self, chunk_size=1000):
+        """
+        Removes entries of sources, which do not exist. Returns number of removed entries.
+        """
+        removed = delete_orphans(self.connection.connection,
+                                 self.connection.entries_table.get_table(),
+                                 "source_id",
+                                 self.connection.sources_table.get_table(),
+                                 chunk_size=chunk_size)
+
+        if removed:
+            ResponseCache.get_object().bump()
 
-        for id in ids_to_remove:
-            self.connection.entries_table.delete(id=id)
+        return removed
 
 
@@ -0,0 +1,112 @@
+import re
+import threading
+from collections import OrderedDict
+
+
+FILTER_FIELDS = ("link", "title", "description")
+
+
+class EntryFilter(object):
+    """
+    Filter of source entries, compiled from source xpath.
+
+    Each line of xpath is one filter '[!][field:]regex'. Field is link, title,
+    or description, link is the default. Filters starting with '!' exclude entries.
+
+    Entry passes, if it matches at least one include filter (if there are any),
+    and none of exclude filters. If any pattern is incorrect, no entry passes.
+    """
+
+    def __init__(self, spec):
+        self.includes = []
+        self.excludes = []
+        self.errors = []
+
+        for line in (spec or "").splitlines():
+            line = line.strip()
+            if line:
+                self.add(line)
+
+    def add(self, line):
+        filters = self.includes
+        if line.startswith("!"):
+            filters = self.excludes
+            line = line[1:]
+
+        field = "link"
+        name, separator, pattern = line.partition(":")
+        if separator and name in FILTER_FIELDS:
+            field = name
+            line = pattern
+
+        try:
+            filters.append((field, re.compile(line)))
+        except re.error as E:
+            self.errors.append((line, E))
+
+    def is_ok(self, entry):
+        if self.errors:
+            return False
+
+        if self.includes and not any(self.is_match(entry, field, pattern) for field, pattern in self.includes):
+            return False
+
+        if any(self.is_match(entry, field, pattern) for field, pattern in self.excludes):
+            return False
+
+        return True
+
+    def is_match(self, entry, field, pattern):
+        value = entry.get(field)
+        if not value or not isinstance(value, str):
+            return False
+        return pattern.search(value) is not None
+
+    def filter(self, entries):
+        """
+        Returns entries, which pass the filter
+        """
+        if self.errors:
+            return []
+        if not self.includes and not self.excludes:
+            return list(entries)
+        return [entry for entry in entries if self.is_ok(entry)]
+
+
+class EntryFilters(object):
+    """
+    Least recently used cache of compiled filters, keyed by filter text.
+    When source xpath changes, filter is compiled again on next use.
+    """
+    instance = None
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.filters = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_object():
+        if EntryFilters.instance is None:
+            EntryFilters.instance = EntryFilters()
+        return EntryFilters.instance
+
+    def get(self, spec):
+        with self.lock:
+            entry_filter = self.filters.get(spec)
+            if entry_filter is not None:
+                self.filters.move_to_end(spec)
+            return entry_filter
+
+    def set(self, spec, entry_filter):
+        with self.lock:
+            self.filters[spec] = entry_filter
+            self.filters.move_to_end(spec)
+            while len(self.filters) > self.max_size:
+                self.filters.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.filters.clear()
+
+    def count(self):
+        return len(self.filters)
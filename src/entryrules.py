@@ -0,0 +1,240 @@
+import threading
+from collections import deque
+from urllib.parse import urlparse
+
+
+TEXT_RULE_PREFIX = "text:"
+
+DEFAULT_TEXT_FIELDS = ("title", "description")
+
+
+def get_host(url):
+    try:
+        host = urlparse(url).hostname
+    except ValueError:
+        return
+    return host
+
+
+def is_host_rule(rule):
+    """
+    Host rule is domain name, without scheme, or path, like 'example.com'
+    """
+    return "://" not in rule and "/" not in rule and "." in rule
+
+
+class PrefixTrie(object):
+    """
+    Character trie of URL prefixes
+    """
+    def __init__(self):
+        self.root = {}
+
+    def add(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = True
+
+    def is_match(self, text):
+        node = self.root
+        if None in node:
+            return True
+
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return False
+            if None in node:
+                return True
+
+        return False
+
+
+class HostTrie(object):
+    """
+    Trie of host labels, in reverse order. Host matches itself, and its subdomains.
+    """
+    def __init__(self):
+        self.root = {}
+
+    def add(self, host):
+        node = self.root
+        for label in reversed(host.lower().split(".")):
+            node = node.setdefault(label, {})
+        node[None] = True
+
+    def is_match(self, host):
+        if not host or not self.root:
+            return False
+
+        node = self.root
+        for label in reversed(host.lower().split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if None in node:
+                return True
+
+        return False
+
+
+class TextAutomaton(object):
+    """
+    Aho-Corasick automaton. Finds all patterns in one pass over the text.
+    Matching is case insensitive.
+    """
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+
+        for index, pattern in enumerate(patterns):
+            self.add(pattern.lower(), index)
+
+        self.build()
+
+    def add(self, pattern, index):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.goto[state][char] = next_state
+            state = next_state
+        self.outputs[state].append(index)
+
+    def build(self):
+        states = deque(self.goto[0].values())
+        while states:
+            state = states.popleft()
+            for char, next_state in self.goto[state].items():
+                states.append(next_state)
+
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(char, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def find(self, text):
+        """
+        Yields indexes of patterns found in text, once for each occurrence
+        """
+        state = 0
+        for char in text.lower():
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            yield from self.outputs[state]
+
+
+class TextRule(object):
+    def __init__(self, text, fields, hits):
+        self.text = text
+        self.fields = fields
+        self.hits = hits
+
+
+class EntryRuleMatcher(object):
+    """
+    Entry rules, compiled for matching.
+
+    Rule is exact URL, URL prefix ending with '*', host name, which also matches
+    subdomains, or text, which is searched in entry fields.
+    """
+    def __init__(self, rules):
+        self.urls = set()
+        self.prefixes = PrefixTrie()
+        self.hosts = HostTrie()
+        self.text_rules = []
+
+        for rule in rules:
+            if rule.enabled is False or rule.block is False:
+                continue
+
+            if rule.trigger_text:
+                fields = tuple(field.strip() for field in (rule.trigger_text_fields or "").split(",") if field.strip())
+                self.text_rules.append(TextRule(rule.trigger_text, fields or DEFAULT_TEXT_FIELDS, max(rule.trigger_text_hits or 0, 1)))
+
+            url = (rule.trigger_rule_url or "").strip()
+            if not url:
+                continue
+
+            if url.endswith("*"):
+                self.prefixes.add(url[:-1])
+            elif is_host_rule(url):
+                self.hosts.add(url)
+            else:
+                self.urls.add(url)
+
+        self.automaton = TextAutomaton([text_rule.text for text_rule in self.text_rules])
+        self.text_fields = tuple(set(field for text_rule in self.text_rules for field in text_rule.fields))
+
+    def is_url_triggered(self, url):
+        if not url:
+            return False
+
+        if url in self.urls:
+            return True
+        if self.prefixes.is_match(url):
+            return True
+        return self.hosts.is_match(get_host(url))
+
+    def is_text_triggered(self, entry):
+        if not self.text_rules:
+            return False
+
+        hits = {}
+        for field in self.text_fields:
+            value = entry.get(field)
+            if not value or not isinstance(value, str):
+                continue
+
+            for index in self.automaton.find(value):
+                text_rule = self.text_rules[index]
+                if field not in text_rule.fields:
+                    continue
+
+                hits[index] = hits.get(index, 0) + 1
+                if hits[index] >= text_rule.hits:
+                    return True
+
+        return False
+
+    def is_entry_triggered(self, entry):
+        return self.is_url_triggered(entry.get("link")) or self.is_text_triggered(entry)
+
+
+class EntryRules(object):
+    """
+    Keeps compiled matcher for each database. Matcher is rebuilt only after rules change.
+
+    Matcher is compiled without lock held. It is stored only if rules did not change
+    in the meantime, which is told by generation of the database.
+    """
+    matchers = {}
+    generations = {}
+    lock = threading.Lock()
+
+    def get_matcher(connection):
+        db_file = str(connection.db_file)
+        with EntryRules.lock:
+            matcher = EntryRules.matchers.get(db_file)
+            generation = EntryRules.generations.get(db_file, 0)
+
+        if matcher is None:
+            matcher = EntryRuleMatcher(list(connection.entry_rules.get_where()))
+            with EntryRules.lock:
+                if EntryRules.generations.get(db_file, 0) == generation:
+                    EntryRules.matchers[db_file] = matcher
+
+        return matcher
+
+    def invalidate(db_file):
+        with EntryRules.lock:
+            EntryRules.matchers.pop(str(db_file), None)
+            EntryRules.generations[str(db_file)] = EntryRules.generations.get(str(db_file), 0) + 1
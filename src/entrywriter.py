@@ -1,5 +1,7 @@
+from html import escape
 from pathlib import Path
 from .system import System
+from .filewriter import write_text_with_gzip
 
 
 class PagePagination:
@@ -25,42 +27,32 @@ class EntryPageWriter(object):
         self.page_size = page_size
 
     def write(self):
-        system = System.get_object()
-
-        html = self.get_html()
-        path = Path(system.get_export_dir())
-        if not path.exists():
-            path.mkdir()
-
-        path = Path(self.get_file_name())
-        path.write_text(html)
+        write_text_with_gzip(self.get_file_name(), self.get_html())
 
     def get_file_name(self):
         system = System.get_object()
-        return Path(system.get_export_dir() / f"index_{self.page_num}.html"
+        return Path(system.get_export_dir()) / f"index_{self.page_num}.html"
 
     def get_entries(self):
         p = PagePagination(page_num=self.page_num, page_size=self.page_size)
         limit = p.get_limit()
         offset = p.get_offset()
 
-        table = connection.entries_table.get_table()
+        table = self.connection.entries_table.get_table()
         order_by = [
-          table.c.date_published.desc()
+          table.c.date_published.desc(),
+          table.c.id.desc(),
         ]
 
-        entries = list(connection.entries_table.get_where(limit=limit,
-                                                          offset=offset,
-                                                          order_by=order_by))
+        entries = list(self.connection.entries_table.get_where(limit=limit,
+                                                               offset=offset,
+                                                               order_by=order_by))
         return entries
 
     def get_html(self):
         entries = self.get_entries()
 
-        entries_html = ""
-
-        for entry in entries:
-            entries_html += self.get_entry_html(entry)
+        entries_html = "".join(self.get_entry_html(entry) for entry in entries)
 
         text = f"""
         <html>
@@ -77,8 +69,7 @@ class EntryPageWriter(object):
     def get_entry_html(self, entry):
         return f"""
         <div>
-        {entry.link}
-        {entry.title}
+        <a href="{escape(entry.link)}">{escape(entry.title or entry.link)}</a>
         </div>
         """
 
@@ -90,7 +81,7 @@ class EntryWriter(object):
         self.page_size = page_size
 
     def write(self):
-        for page in range(self.number_of_pages):
+        for page_num in range(1, self.number_of_pages + 1):
             w = EntryPageWriter(connection=self.connection,
                     page_num=page_num,
                     page_size=self.page_size)
@@ -0,0 +1,137 @@
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy import select, func
+
+from .dbconnection import DbConnection
+from .sources import Sources
+from .system import System
+from .sourcewriter import SourceWriter
+from .entrywriter import EntryWriter
+from .filewriter import write_file, remove_file_with_gzip
+
+
+class Exporter(object):
+    """
+    Exports static HTML pages, of entries and of each source.
+
+    Export is incremental. Signature of each source is stored in manifest.
+    Only pages of sources, which signature changed since the last export, are written.
+    Pages are rendered by worker pool, each worker uses its own connection.
+    """
+
+    def __init__(self, db_file, workers=5):
+        self.db_file = db_file
+        self.workers = max(int(workers), 1)
+
+    def export(self, force=False):
+        """
+        Returns tuple (number of written source pages, number of removed source pages)
+        """
+        connection = DbConnection(self.db_file)
+        try:
+            new_manifest = self.get_manifest(connection)
+        finally:
+            connection.close()
+
+        manifest = {} if force else self.read_manifest()
+
+        changed_ids = [int(source_id) for source_id, data in new_manifest.items()
+                       if manifest.get(source_id, {}).get("signature") != data["signature"]]
+        removed_ids = [source_id for source_id in manifest if source_id not in new_manifest]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export") as executor:
+            futures = [executor.submit(self.write_source, source_id) for source_id in changed_ids]
+            if changed_ids or removed_ids or not manifest:
+                futures.append(executor.submit(self.write_entries))
+
+            for future in as_completed(futures):
+                future.result()
+
+        for source_id in removed_ids:
+            remove_file_with_gzip(manifest[source_id]["file"])
+
+        self.write_manifest(new_manifest)
+
+        return len(changed_ids), len(removed_ids)
+
+    def get_manifest(self, connection):
+        """
+        Returns map of source id to signature and page file name. Signature changes,
+        when source, or any of its entries is added, updated, or removed.
+        Read by one query.
+        """
+        sources_table = connection.sources_table.get_table()
+        entries_table = connection.entries_table.get_table()
+
+        entries_stats = (
+            select(
+                entries_table.c.source_id,
+                func.count().label("entries_count"),
+                func.max(entries_table.c.id).label("max_id"),
+                func.max(entries_table.c.date_update_last).label("date_update_last"),
+            )
+            .group_by(entries_table.c.source_id)
+            .subquery()
+        )
+
+        stmt = (
+            select(
+                sources_table.c.id,
+                sources_table.c.url,
+                sources_table.c.title,
+                entries_stats.c.entries_count,
+                entries_stats.c.max_id,
+                entries_stats.c.date_update_last,
+            )
+            .select_from(sources_table)
+            .outerjoin(entries_stats, entries_stats.c.source_id == sources_table.c.id)
+        )
+
+        sources = Sources(connection)
+
+        manifest = {}
+        for row in connection.connection.execute(stmt):
+            signature = [
+                row.url,
+                row.title,
+                row.entries_count or 0,
+                row.max_id,
+                str(row.date_update_last),
+            ]
+            manifest[str(row.id)] = {"signature": signature, "file": str(sources.get_file_name(row))}
+
+        return manifest
+
+    def write_source(self, source_id):
+        connection = DbConnection(self.db_file)
+        try:
+            source = Sources(connection).get(source_id)
+            if source:
+                SourceWriter(connection, source).write()
+        finally:
+            connection.close()
+
+    def write_entries(self):
+        connection = DbConnection(self.db_file)
+        try:
+            EntryWriter(connection).write()
+        finally:
+            connection.close()
+
+    def get_manifest_file_name(self):
+        system = System.get_object()
+        return Path(system.get_export_dir()) / "export.json"
+
+    def read_manifest(self):
+        path = self.get_manifest_file_name()
+        if not path.exists():
+            return {}
+
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def write_manifest(self, manifest):
+        write_file(self.get_manifest_file_name(), json.dumps(manifest, indent=1).encode("utf-8"))
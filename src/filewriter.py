@@ -0,0 +1,34 @@
+import os
+import gzip
+from pathlib import Path
+
+
+def write_file(path, data):
+    """
+    Writes file atomically. Data is written to temporary file, which replaces target.
+    Readers see either old, or new file, never partial one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def write_text_with_gzip(path, text):
+    """
+    Writes text file, and its precompressed .gz sibling
+    """
+    path = Path(path)
+    data = text.encode("utf-8")
+
+    write_file(path, data)
+    write_file(path.with_name(path.name + ".gz"), gzip.compress(data))
+
+
+def remove_file_with_gzip(path):
+    path = Path(path)
+    for file_path in [path, path.with_name(path.name + ".gz")]:
+        if file_path.exists():
+            file_path.unlink()
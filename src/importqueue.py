@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+
+class ImportJob(object):
+    """
+    Import of source URLs. Progress is updated by the runner thread, while it is read by web requests.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, id, urls):
+        self.id = id
+        self.urls = urls
+        self.total = len(urls)
+        self.status = ImportJob.QUEUED
+        self.processed = 0
+        self.added = 0
+        self.existing = 0
+        self.blocked = 0
+        self.error = ""
+        self.date_created = datetime.now()
+        self.date_done = None
+
+    def get_chunks(self, chunk_size):
+        for index in range(0, len(self.urls), chunk_size):
+            yield self.urls[index:index + chunk_size]
+
+    def set_done(self, error=""):
+        self.status = ImportJob.FAILED if error else ImportJob.DONE
+        self.error = error
+        self.date_done = datetime.now()
+        # urls are not needed anymore, finished jobs are kept only for their status
+        self.urls = []
+
+    def to_json(self):
+        json_data = {}
+        json_data["id"] = self.id
+        json_data["status"] = self.status
+        json_data["total"] = self.total
+        json_data["processed"] = self.processed
+        json_data["added"] = self.added
+        json_data["existing"] = self.existing
+        json_data["blocked"] = self.blocked
+        json_data["error"] = self.error
+        json_data["date_created"] = self.date_created.isoformat()
+        json_data["date_done"] = self.date_done.isoformat() if self.date_done else None
+        return json_data
+
+
+class ImportQueue(object):
+    """
+    Queue of source imports, shared by web requests and the runner thread.
+
+    Web requests add jobs, the runner takes them, and writes sources in chunks.
+    The last max_jobs jobs are kept, so their progress can be read.
+    """
+    instance = None
+
+    def __init__(self, max_jobs=100, chunk_size=500):
+        self.max_jobs = max_jobs
+        self.chunk_size = chunk_size
+        self.jobs = OrderedDict()
+        self.queued = deque()
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def get_object():
+        if ImportQueue.instance is None:
+            ImportQueue.instance = ImportQueue()
+        return ImportQueue.instance
+
+    def add(self, urls):
+        """
+        Returns job. Duplicate URLs are dropped, order is kept.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+
+        with self.lock:
+            job = ImportJob(self.next_id, urls)
+            self.next_id += 1
+
+            self.jobs[job.id] = job
+            self.queued.append(job)
+
+            finished_ids = [id for id, old_job in self.jobs.items() if old_job.date_done is not None]
+            for old_id in finished_ids[:max(len(self.jobs) - self.max_jobs, 0)]:
+                del self.jobs[old_id]
+
+        return job
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def pop(self):
+        """
+        Returns next queued job, or None
+        """
+        with self.lock:
+            if self.queued:
+                return self.queued.popleft()
+
+    def is_empty(self):
+        with self.lock:
+            return len(self.queued) == 0
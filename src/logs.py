@@ -0,0 +1,77 @@
+from datetime import datetime
+from sqlalchemy import select, or_
+
+from .applogging import AppLogging
+from .pagination import paginate, get_page
+
+
+def parse_level(level):
+    """
+    Level can be number, or name, like 'error'
+    """
+    if level is None or level == "":
+        return
+
+    try:
+        return int(level)
+    except ValueError:
+        pass
+
+    value = getattr(AppLogging, str(level).upper(), None)
+    if isinstance(value, int):
+        return value
+
+
+def parse_date(date):
+    if not date:
+        return
+
+    try:
+        return datetime.fromisoformat(date)
+    except ValueError:
+        return
+
+
+class Logs(object):
+    """
+    Reads application logs, newest first
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, level=None, date_from=None, date_to=None, text=None, limit=None, offset=0, cursor=None):
+        """
+        Returns logs with level at least level, from time window, containing text, newest first
+        """
+        table = self.connection.applogging.get_table()
+
+        stmt = select(table)
+        order_columns = self.get_order_columns()
+
+        level = parse_level(level)
+        if level is not None:
+            stmt = stmt.where(table.c.level >= level)
+
+        date_from = parse_date(date_from)
+        if date_from:
+            stmt = stmt.where(table.c.date >= date_from)
+
+        date_to = parse_date(date_to)
+        if date_to:
+            stmt = stmt.where(table.c.date < date_to)
+
+        if text:
+            stmt = stmt.where(or_(table.c.info_text.ilike(f"%{text}%"), table.c.detail_text.ilike(f"%{text}%")))
+
+        return paginate(self.connection.connection, stmt, order_columns, limit, offset, cursor)
+
+    def search_page(self, level=None, date_from=None, date_to=None, text=None, limit=None, offset=0, cursor=None):
+        """
+        Returns tuple (logs, cursor of the next page)
+        """
+        logs = self.search(level, date_from, date_to, text, limit=limit, offset=offset, cursor=cursor)
+        return get_page(logs, self.get_order_columns(), limit)
+
+    def get_order_columns(self):
+        table = self.connection.applogging.get_table()
+        return [table.c.date, table.c.id]
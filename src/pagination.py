@@ -0,0 +1,129 @@
+import json
+import base64
+from datetime import datetime
+from sqlalchemy import and_, literal, true, tuple_
+
+
+def encode_cursor(values):
+    """
+    Encodes values of the last row into opaque cursor text
+    """
+    data = []
+    for value in values:
+        if isinstance(value, datetime):
+            data.append({"d": value.isoformat()})
+        else:
+            data.append(value)
+
+    text = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Returns list of values, or None if cursor is not valid
+    """
+    if not cursor:
+        return
+
+    try:
+        text = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        data = json.loads(text)
+    except Exception:
+        return
+
+    if not isinstance(data, list):
+        return
+
+    values = []
+    for value in data:
+        if isinstance(value, dict):
+            try:
+                value = datetime.fromisoformat(value["d"])
+            except Exception:
+                return
+        values.append(value)
+
+    return values
+
+
+def get_keyset_conditions(columns, values):
+    """
+    Returns conditions for rows, which follow values, when ordered by columns descending.
+    Columns are (nullable column, id).
+
+    SQLite sorts NULLs last in descending order, but row value comparison skips NULLs.
+    Rows with NULL are therefore selected by separate condition, which should be read
+    after the first one. Each condition can seek in the index on columns.
+    """
+    column, id_column = columns
+    value, id_value = values
+
+    if value is None:
+        return [and_(column.is_(None), id_column < literal(id_value, id_column.type))]
+
+    return [
+        tuple_(column, id_column) < tuple_(literal(value, column.type), literal(id_value, id_column.type)),
+        column.is_(None),
+    ]
+
+
+def execute_keyset(connection, stmt, conditions, limit=None):
+    """
+    Executes statement for each keyset condition, until limit rows are read
+    """
+    for condition in conditions:
+        rows = list(connection.execute(stmt.where(condition)))
+        for row in rows:
+            yield row
+
+        if limit is not None:
+            limit -= len(rows)
+            if limit <= 0:
+                return
+            stmt = stmt.limit(limit)
+
+
+def get_next_cursor(rows, columns, limit):
+    """
+    Returns cursor of the next page, or None if this is the last page
+    """
+    if limit is None or len(rows) < limit:
+        return
+
+    last_row = rows[-1]
+    return encode_cursor([getattr(last_row, column.name) for column in columns])
+
+
+def paginate(connection, stmt, order_columns, limit=None, offset=0, cursor=None, order_by=None):
+    """
+    Yields rows of statement, ordered by order_columns descending, or by order_by.
+    Cursor, returned by get_page, continues after the last row of the previous page.
+    It is used instead of offset.
+    """
+    if order_by is None:
+        order_by = [order_column.desc() for order_column in order_columns]
+
+    cursor_values = decode_cursor(cursor)
+    if cursor_values and len(cursor_values) == len(order_columns):
+        conditions = get_keyset_conditions(order_columns, cursor_values)
+        offset = 0
+    else:
+        conditions = [true()]
+
+    stmt = stmt.order_by(*order_by)
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    for row in execute_keyset(connection, stmt, conditions, limit):
+        yield row
+
+
+def get_page(rows, order_columns, limit):
+    """
+    Returns tuple (rows, cursor of the next page)
+    """
+    rows = list(rows)
+    return rows, get_next_cursor(rows, order_columns, limit)
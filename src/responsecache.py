@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """
+    Cache of rendered responses, keyed by (endpoint, query arguments).
+
+    Every response is stored with the data version it was computed for.
+    Anything that writes entries, or sources calls bump(), which makes all
+    stored responses stale.
+
+    Responses built from a known set of sources can be stored with versions
+    of these sources instead. They become stale only if one of the sources
+    changes, or if data is changed without telling which source it belongs to.
+
+    Concurrent requests for the same key and version are coalesced. Only the
+    first one computes response, others wait for its result.
+    """
+    instance = None
+
+    def __init__(self, max_size=500, max_source_versions=10000):
+        self.max_size = max_size
+        self.max_source_versions = max_source_versions
+        self.version = 0
+        self.generation = 0
+        self.source_versions = {}
+        self.responses = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get_object():
+        if ResponseCache.instance is None:
+            ResponseCache.instance = ResponseCache()
+        return ResponseCache.instance
+
+    def get_etag(body):
+        return hashlib.sha256(body).hexdigest()[:32]
+
+    def bump(self, source_id=None):
+        """
+        Called after data of source changes. Without source all data is considered changed.
+        """
+        with self.lock:
+            self.version += 1
+            if source_id is None or len(self.source_versions) >= self.max_source_versions:
+                self.new_generation()
+            if source_id is not None:
+                self.source_versions[source_id] = self.source_versions.get(source_id, 0) + 1
+
+    def remove(self, source_id):
+        """
+        Called after source is removed. Its version is not kept.
+        """
+        with self.lock:
+            self.version += 1
+            self.new_generation()
+
+    def new_generation(self):
+        """
+        All responses stored with source versions become stale, therefore source
+        versions can start again. Has to be called with lock held.
+        """
+        self.generation += 1
+        self.source_versions = {}
+
+    def get_version(self):
+        return self.version
+
+    def get_validity(self, source_ids=None):
+        """
+        Returns value, which changes when data used by response changes.
+        Has to be called with lock held.
+        """
+        if source_ids is None:
+            return self.version
+
+        return (self.generation, tuple((id, self.source_versions.get(id, 0)) for id in source_ids))
+
+    def get(self, key, compute, source_ids=None):
+        """
+        Returns tuple (body, etag). compute() returns body bytes, it is called
+        only if there is no valid response for the key.
+        """
+        while True:
+            with self.lock:
+                validity = self.get_validity(source_ids)
+                cached = self.responses.get(key)
+                if cached is not None and cached[0] == validity:
+                    self.responses.move_to_end(key)
+                    return cached[1], cached[2]
+
+                event = self.pending.get((key, validity))
+                is_owner = event is None
+                if is_owner:
+                    event = threading.Event()
+                    self.pending[(key, validity)] = event
+
+            if not is_owner:
+                event.wait()
+                continue
+
+            try:
+                body = compute()
+                etag = ResponseCache.get_etag(body)
+
+                with self.lock:
+                    if validity == self.get_validity(source_ids):
+                        self.responses[key] = (validity, body, etag)
+                        self.responses.move_to_end(key)
+                        while len(self.responses) > self.max_size:
+                            self.responses.popitem(last=False)
+
+                return body, etag
+            finally:
+                with self.lock:
+                    del self.pending[(key, validity)]
+                event.set()
+
+    def count(self):
+        return len(self.responses)
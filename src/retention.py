@@ -0,0 +1,159 @@
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, func, and_, or_
+
+from .responsecache import ResponseCache
+
+
+class Retention(object):
+    """
+    Removes entries, which are older than remove_after_days of their source,
+    and the oldest entries over global row limit.
+
+    Bookmarked and permanent entries are never removed.
+    Entries are removed in small chunks, each in own transaction, with pause
+    in between, therefore write lock is held only briefly.
+    """
+
+    def __init__(self, connection, chunk_size=200, pause_s=0.01):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.pause_s = pause_s
+
+        self.removed_rows = 0
+        self.removed_bytes = 0
+        self.source_ids = set()
+
+    def run(self, max_entries=None, now=None):
+        """
+        Returns report, map with number of removed rows and bytes of their text
+        """
+        self.remove_expired(now)
+        if max_entries is not None:
+            self.remove_overflow(max_entries)
+
+        return self.get_report()
+
+    def get_report(self):
+        report = {}
+        report["rows"] = self.removed_rows
+        report["bytes"] = self.removed_bytes
+        report["sources"] = len(self.source_ids)
+        return report
+
+    def get_date_limit(source, now=None):
+        """
+        Returns date, entries of source published before it are expired, or None
+        """
+        if not source.remove_after_days or source.remove_after_days <= 0:
+            return
+
+        if now is None:
+            now = datetime.now()
+        return now - timedelta(days=source.remove_after_days)
+
+    def is_expired(entry_json, date_limit):
+        """
+        Fetched entry is expired, if it would be removed by the next run.
+        Entry without publish date is not, its creation date is now.
+        """
+        if date_limit is None or entry_json.get("bookmarked") or entry_json.get("permanent"):
+            return False
+
+        date_published = entry_json.get("date_published")
+        if not isinstance(date_published, datetime):
+            return False
+
+        if date_published.tzinfo is not None:
+            date_published = date_published.replace(tzinfo=None)
+        return date_published < date_limit
+
+    def remove_expired(self, now=None):
+        if now is None:
+            now = datetime.now()
+
+        sources_table = self.connection.sources_table.get_table()
+        stmt = select(sources_table.c.id, sources_table.c.remove_after_days).where(sources_table.c.remove_after_days > 0)
+
+        for row in list(self.connection.connection.execute(stmt)):
+            self.remove_source_expired(row.id, now - timedelta(days=row.remove_after_days))
+
+    def remove_source_expired(self, source_id, date_limit):
+        table = self.connection.entries_table.get_table()
+
+        is_expired = or_(
+            table.c.date_published < date_limit,
+            and_(table.c.date_published.is_(None), table.c.date_created < date_limit),
+        )
+
+        while True:
+            stmt = (
+                select(*self.get_chunk_columns())
+                .where(table.c.source_id == source_id, is_expired, self.get_removable_condition())
+                .limit(self.chunk_size)
+            )
+            if not self.remove_chunk(stmt):
+                break
+
+    def remove_overflow(self, max_entries):
+        """
+        Removes the oldest entries, until there are at most max_entries.
+        Entry without publish date is as old as its creation date.
+        """
+        table = self.connection.entries_table.get_table()
+        date = func.coalesce(table.c.date_published, table.c.date_created)
+
+        count = self.connection.connection.execute(select(func.count()).select_from(table)).scalar()
+        while count > max_entries:
+            stmt = (
+                select(*self.get_chunk_columns())
+                .where(self.get_removable_condition())
+                .order_by(date.asc(), table.c.id.asc())
+                .limit(min(self.chunk_size, count - max_entries))
+            )
+            removed = self.remove_chunk(stmt)
+            if not removed:
+                break
+            count -= removed
+
+    def get_chunk_columns(self):
+        table = self.connection.entries_table.get_table()
+
+        size = (
+            func.coalesce(func.length(table.c.link), 0)
+            + func.coalesce(func.length(table.c.title), 0)
+            + func.coalesce(func.length(table.c.description), 0)
+            + func.coalesce(func.length(table.c.thumbnail), 0)
+        )
+
+        return [table.c.id, table.c.source_id, size.label("size")]
+
+    def get_removable_condition(self):
+        table = self.connection.entries_table.get_table()
+        return and_(table.c.bookmarked == False, table.c.permanent == False)
+
+    def remove_chunk(self, stmt):
+        """
+        Removes entries selected by statement. Returns number of removed entries.
+        """
+        table = self.connection.entries_table.get_table()
+
+        rows = list(self.connection.connection.execute(stmt))
+        if not rows:
+            return 0
+
+        self.connection.connection.execute(delete(table).where(table.c.id.in_([row.id for row in rows])))
+        self.connection.connection.commit()
+
+        cache = ResponseCache.get_object()
+        for source_id in set(row.source_id for row in rows):
+            cache.bump(source_id)
+
+        self.removed_rows += len(rows)
+        self.removed_bytes += sum(row.size or 0 for row in rows)
+        self.source_ids.update(row.source_id for row in rows)
+
+        if self.pause_s:
+            time.sleep(self.pause_s)
+
+        return len(rows)
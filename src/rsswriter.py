@@ -0,0 +1,52 @@
+import os
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+from .sources import Sources
+from .entries import Entries
+from .system import System
+from .serializers import entry_to_feed_json, source_to_json, source_and_entries_to_rss_stream
+
+
+class RssWriter(object):
+    """
+    Writes RSS of source, compressed, into export directory.
+    Written after source is read, therefore /rss/<source_id> can serve stored file.
+    """
+    default_limit = 1000
+
+    def __init__(self, connection, source, limit=None):
+        self.connection = connection
+        self.source = source
+        self.limit = limit if limit is not None else RssWriter.default_limit
+
+    def write(self):
+        path = self.get_file_name()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # file is replaced atomically, readers never see partial file.
+        # Temporary file is unique, source can be written by reading thread, and by web request.
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix=".tmp", delete=False) as temp_file:
+            with gzip.open(temp_file, "wt", encoding="utf-8") as f:
+                for text in self.get_rss_stream():
+                    f.write(text)
+
+        os.replace(temp_file.name, path)
+
+    def get_file_name(self):
+        sources = Sources(self.connection)
+        return sources.get_rss_file_name(self.source)
+
+    def get_rss_stream(self):
+        entries = Entries(self.connection).get_feed_rows(self.source.id, limit=self.limit)
+        entry_jsons = (entry_to_feed_json(entry) for entry in entries)
+
+        return source_and_entries_to_rss_stream(source_to_json(self.source), entry_jsons)
+
+    def remove_all():
+        system = System.get_object()
+        path = Path(system.get_export_dir()) / "rss"
+        if path.exists():
+            shutil.rmtree(path)
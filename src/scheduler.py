@@ -0,0 +1,121 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select
+
+from .sourcedata import SourceData
+
+
+class SourceScheduler(object):
+    """
+    Keeps min-heap of (next_due, source_id).
+
+    Heap is built once, from sources and operational data, then it is maintained
+    in memory. Only due sources are returned, therefore reading thread does not
+    have to scan all sources in every cycle.
+
+    Heap entries are invalidated lazily. Source can be rescheduled, and old heap
+    entry is skipped when it is popped.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.due_times = {}
+        self.lock = threading.Lock()
+
+    def load(self, connection):
+        """
+        Builds heap with one database query
+        """
+        sources_table = connection.sources_table.get_table()
+        op_table = connection.sourceoperationaleata.get_table()
+
+        stmt = (
+            select(
+                sources_table.c.id,
+                sources_table.c.fetch_period,
+                op_table.c.date_fetched,
+            )
+            .select_from(sources_table)
+            .outerjoin(op_table, op_table.c.source_obj_id == sources_table.c.id)
+        )
+
+        due_times = {}
+        for row in connection.connection.execute(stmt):
+            due_times[row.id] = self.get_next_due(row.fetch_period, row.date_fetched)
+
+        with self.lock:
+            self.due_times = due_times
+            self.heap = [(next_due, source_id) for source_id, next_due in due_times.items()]
+            heapq.heapify(self.heap)
+
+    def get_next_due(self, fetch_period, date_fetched):
+        if date_fetched is None:
+            return datetime.now()
+
+        return date_fetched + timedelta(seconds=SourceData.get_fetch_period_s(fetch_period))
+
+    def schedule(self, source_id, next_due):
+        with self.lock:
+            self.due_times[source_id] = next_due
+            heapq.heappush(self.heap, (next_due, source_id))
+
+    def schedule_source(self, source, date_fetched=None):
+        """
+        Schedules source after it has been fetched at date_fetched.
+        Without date it is scheduled to be read right away.
+        """
+        self.schedule(source.id, self.get_next_due(source.fetch_period, date_fetched))
+
+    def schedule_missing(self, source_ids, next_due):
+        """
+        Schedules sources, which are not in schedule
+        """
+        with self.lock:
+            for source_id in source_ids:
+                if source_id not in self.due_times:
+                    self.due_times[source_id] = next_due
+                    heapq.heappush(self.heap, (next_due, source_id))
+
+    def remove(self, source_id):
+        with self.lock:
+            self.due_times.pop(source_id, None)
+
+    def pop_due(self, now=None, limit=None):
+        """
+        Returns ids of sources, which are due, at most limit of them. They are removed from schedule.
+        """
+        if now is None:
+            now = datetime.now()
+
+        source_ids = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                if limit is not None and len(source_ids) >= limit:
+                    break
+                next_due, source_id = heapq.heappop(self.heap)
+                if self.due_times.get(source_id) != next_due:
+                    continue
+
+                del self.due_times[source_id]
+                source_ids.append(source_id)
+
+        return source_ids
+
+    def get_wait_time(self, now=None):
+        """
+        Returns time until the earliest due source, or None if nothing is scheduled
+        """
+        if now is None:
+            now = datetime.now()
+
+        with self.lock:
+            while self.heap:
+                next_due, source_id = self.heap[0]
+                if self.due_times.get(source_id) == next_due:
+                    return max(next_due - now, timedelta(0))
+
+                heapq.heappop(self.heap)
+
+    def count(self):
+        return len(self.due_times)
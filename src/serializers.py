@@ -1,3 +1,6 @@
+from xml.sax.saxutils import escape, quoteattr
+
+
 def iso_z(dt):
     if dt:
         return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
@@ -46,6 +49,31 @@ def entry_to_json(entry, with_id=False, source=None):
     return json_entry
 
 
+def entry_to_feed_json(entry):
+    """
+    Converts entry row, which has only feed columns
+    """
+    json_entry = {}
+    json_entry["id"] = entry.id
+    json_entry["source_id"] = entry.source_id
+    json_entry["title"] = entry.title
+    json_entry["description"] = entry.description
+    json_entry["link"] = entry.link
+    json_entry["date_published"] = iso_z(entry.date_published)
+    json_entry["thumbnail"] = entry.thumbnail
+    return json_entry
+
+
+def log_to_json(log):
+    json_log = {}
+    json_log["id"] = log.id
+    json_log["date"] = iso_z(log.date)
+    json_log["level"] = log.level
+    json_log["info_text"] = log.info_text
+    json_log["detail_text"] = log.detail_text
+    return json_log
+
+
 def source_to_json(source, with_id=False):
     json_data = {
        "link" : source.url,
@@ -58,37 +86,47 @@ def source_to_json(source, with_id=False):
     return json_data
 
 
-def source_and_entries_to_rss(source_json, entries_jsons):
-    channel_rss_text = source_json_to_rss(source_json)
-    entry_rss_text = entry_jsons_to_rss(entries_jsons, channel_rss_text)
-
-    rss_template = """<?xml version="1.0" encoding="UTF-8"?>
+RSS_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
 <rss xmlns:dc="http://purl.org/dc/elements/1.1/" 
      xmlns:content="http://purl.org/rss/1.0/modules/content/" 
      xmlns:atom="http://www.w3.org/2005/Atom" 
      version="2.0" 
      xmlns:media="http://search.yahoo.com/mrss/">
     <channel>
-        {channel_info}
-        {items}
-    </channel>
+"""
+
+RSS_FOOTER = """    </channel>
 </rss>"""
 
-    return rss_template.format(channel_info=channel_rss_text, items=entry_rss_text)
+
+def source_and_entries_to_rss(source_json, entries_jsons):
+    return "".join(source_and_entries_to_rss_stream(source_json, entries_jsons))
+
+
+def source_and_entries_to_rss_stream(source_json, entries_jsons):
+    """
+    Yields RSS document in parts. Entries can be any iterable, they are
+    converted one by one, therefore whole feed is never kept in memory.
+    """
+    yield RSS_HEADER
+    yield source_json_to_rss(source_json)
+    for entry in entries_jsons:
+        yield entry_json_to_rss(entry)
+    yield RSS_FOOTER
 
 
 def source_json_to_rss(source):
     channel_info = ""
     if source.get("title"):
-        channel_info += f"<title>{source['title']}</title>\n"
-    if source.get("url"):
-        channel_info += f"<link>{source['url']}</link>\n"
+        channel_info += f"<title>{escape(source['title'])}</title>\n"
+    if source.get("link"):
+        channel_info += f"<link>{escape(source['link'])}</link>\n"
     if source.get("favicon"):
-        channel_info += f"<image><url>{source['favicon']}</url></image>\n"
+        channel_info += f"<image><url>{escape(source['favicon'])}</url></image>\n"
     if source.get("date_published"):
-        channel_info += f"<published>{source['date_published']}</published>\n"
+        channel_info += f"<published>{escape(source['date_published'])}</published>\n"
     if source.get("language"):
-        channel_info += f"<language>{source['language']}</language>\n"
+        channel_info += f"<language>{escape(source['language'])}</language>\n"
 
     return channel_info
 
@@ -97,25 +135,23 @@ def entry_jsons_to_rss(entries, channel_info=""):
     """
     Channel info can be for example <title>Channel Title</title>
     """
-    items = ""
-    for entry in entries:
-        entry_info = "<item>\n"
-
-        if entry.get("title"):
-            entry_info += f"<title><![CDATA[{entry['title']}]]></title>\n"
-        if entry.get("link"):
-            entry_info += f"<link><![CDATA[{entry['link']}]]></link>\n"
-        if entry.get("description"):
-            entry_info += (
-                f"<description><![CDATA[{entry['description']}]]></description>\n"
-            )
-        if entry.get("date_published"):
-            entry_info += f"<pubDate><![CDATA[{entry['date_published']}]]></pubDate>\n"
-        if entry.get("thumbnail"):
-            entry_info += f"<media:thumbnail url=\"{entry['thumbnail']}\"/>\n"
-
-        entry_info += "</item>\n"
-
-        items += entry_info
-
-    return items
+    return "".join(entry_json_to_rss(entry) for entry in entries)
+
+
+def entry_json_to_rss(entry):
+    entry_info = "<item>\n"
+
+    if entry.get("title"):
+        entry_info += f"<title>{escape(entry['title'])}</title>\n"
+    if entry.get("link"):
+        entry_info += f"<link>{escape(entry['link'])}</link>\n"
+    if entry.get("description"):
+        entry_info += f"<description>{escape(entry['description'])}</description>\n"
+    if entry.get("date_published"):
+        entry_info += f"<pubDate>{escape(entry['date_published'])}</pubDate>\n"
+    if entry.get("thumbnail"):
+        entry_info += f"<media:thumbnail url={quoteattr(entry['thumbnail'])}/>\n"
+
+    entry_info += "</item>\n"
+
+    return entry_info
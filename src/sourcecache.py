@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+
+
+class SourceCache(object):
+    """
+    Least recently used cache of source rows, shared by the web process and the reading thread.
+
+    Rows are keyed by (database file, id). Url lookups are mapped to ids.
+    Cache is write-through: anything that modifies, or removes source, invalidates it.
+    """
+    instance = None
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.rows = OrderedDict()
+        self.url_ids = {}
+        self.lock = threading.Lock()
+
+    def get_object():
+        if SourceCache.instance is None:
+            SourceCache.instance = SourceCache()
+        return SourceCache.instance
+
+    def get(self, db_file, id):
+        key = (str(db_file), id)
+        with self.lock:
+            row = self.rows.get(key)
+            if row is not None:
+                self.rows.move_to_end(key)
+            return row
+
+    def get_by_url(self, db_file, url):
+        with self.lock:
+            id = self.url_ids.get((str(db_file), url))
+        if id is not None:
+            return self.get(db_file, id)
+
+    def set(self, db_file, row):
+        key = (str(db_file), row.id)
+        with self.lock:
+            old_row = self.rows.pop(key, None)
+            if old_row is not None:
+                self.url_ids.pop((key[0], old_row.url), None)
+
+            self.rows[key] = row
+            self.url_ids[(key[0], row.url)] = row.id
+
+            while len(self.rows) > self.max_size:
+                (old_file, old_id), old_row = self.rows.popitem(last=False)
+                self.url_ids.pop((old_file, old_row.url), None)
+
+    def invalidate(self, db_file, id=None, url=None):
+        with self.lock:
+            if id is None and url is not None:
+                id = self.url_ids.get((str(db_file), url))
+            if id is None:
+                return
+
+            row = self.rows.pop((str(db_file), id), None)
+            if row is not None:
+                self.url_ids.pop((str(db_file), row.url), None)
+
+    def clear(self, db_file=None):
+        with self.lock:
+            if db_file is None:
+                self.rows = OrderedDict()
+                self.url_ids = {}
+                return
+
+            for key in [key for key in self.rows if key[0] == str(db_file)]:
+                del self.rows[key]
+            for key in [key for key in self.url_ids if key[0] == str(db_file)]:
+                del self.url_ids[key]
+
+    def count(self):
+        return len(self.rows)
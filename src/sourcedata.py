@@ -1,6 +1,27 @@
 import json
+import hashlib
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from .cleanup import delete_orphans
+
+
+def get_response_header(response, name):
+    name = name.lower()
+    for key, value in response.headers.headers.items():
+        if key.lower() == name:
+            return value
+
+
+def calculate_body_hash(response):
+    body = response.get_binary()
+    if body is None:
+        text = response.get_text()
+        if text is None:
+            return
+        body = text.encode("utf-8", errors="ignore")
+
+    return hashlib.sha256(body).digest()
 
 
 class SourceData(object):
@@ -24,30 +45,69 @@ class SourceData(object):
         else:
             self.connection.sourceoperationaleata.insert_json_data(json_data=new_data)
 
-    def is_update_needed(self, source):
-        this_source_data = self.get_source_data(source)
-        if this_source_data:
-            date_fetched = this_source_data.date_fetched
+    def get_request_headers(self, source):
+        """
+        Returns conditional request headers, built from validators of the last fetch
+        """
+        headers = {}
+
+        op_data = self.get_source_data(source)
+        if op_data:
+            if op_data.etag:
+                headers["If-None-Match"] = op_data.etag
+            if op_data.last_modified:
+                headers["If-Modified-Since"] = op_data.last_modified
+
+        return headers
+
+    def set_validators(self, source, response):
+        """
+        Stores ETag and Last-Modified of response
+        """
+        op_data = self.get_source_data(source)
+        if not op_data:
+            return
+
+        new_data = {}
+        new_data["etag"] = get_response_header(response, "ETag")
+        new_data["last_modified"] = get_response_header(response, "Last-Modified")
+
+        self.connection.sourceoperationaleata.update_json_data(id=op_data.id, json_data=new_data)
 
-            fetch_period_s = 3600 # 1 hour
-            if source.fetch_period > 0:
-                fetch_period_s = source.fetch_period
+    def is_body_changed(self, source, body_hash):
+        if body_hash is None:
+            return True
 
-            if datetime.now() - date_fetched < timedelta(seconds=fetch_period_s):
-                return False
+        op_data = self.get_source_data(source)
+        if op_data and op_data.page_hash == body_hash:
+            return False
 
         return True
 
+    def set_body_hash(self, source, body_hash):
+        op_data = self.get_source_data(source)
+        if not op_data:
+            return
+
+        new_data = {}
+        new_data["page_hash"] = body_hash
+
+        self.connection.sourceoperationaleata.update_json_data(id=op_data.id, json_data=new_data)
+
+    def get_fetch_period_s(fetch_period):
+        if fetch_period and fetch_period > 0:
+            return fetch_period
+        return 3600 # 1 hour
+
     def remove(self, source):
         self.connection.sourceoperationaleata.delete_where({"source_obj_id" : source.id})
 
-    def cleanup(self):
-        ids_to_remove = []
-        op_datas = self.connection.sourceoperationaleata.get_where()
-        for op_data in op_datas:
-            source = self.connection.sources_table.get(op_data.source_obj_id)
-            if not source:
-                ids_to_remove.append(op_data.id)
-
-        for id in ids_to_remove:
-            self.connection.sourceoperationaleata.delete(op_data.id)
+    def cleanup(self, chunk_size=1000):
+        """
+        Removes operational data of sources, which do not exist. Returns number of removed rows.
+        """
+        return delete_orphans(self.connection.connection,
+                              self.connection.sourceoperationaleata.get_table(),
+                              "source_obj_id",
+                              self.connection.sources_table.get_table(),
+                              chunk_size=chunk_size)
@@ -1,6 +1,13 @@
+import json
 from pathlib import Path
+from sqlalchemy import select, insert, func, literal, exists, or_
+
 from .system import System
 from .sourcedata import SourceData
+from .sourcecache import SourceCache
+from .responsecache import ResponseCache
+from .filewriter import remove_file_with_gzip
+from .pagination import paginate, get_page
 
 
 class Sources(object):
@@ -26,8 +33,7 @@ class Sources(object):
         if not favicon:
             favicon = ""
 
-        source_iter = self.connection.sources_table.get_where({"url":link})
-        source = next(source_iter, None)
+        source = self.get_by_url(link)
         if source:
             """
             TODO update source
@@ -37,11 +43,18 @@ class Sources(object):
             data["favicon"] = favicon
             data["language"] = favicon
 
-            self.connection.sources_table.update_json_data(source.id, data)
-            return
+            self.update(source.id, data)
+            return source.id
+
+        properties = self.get_new_properties(link, title=title, language=language, favicon=favicon)
 
-        properties = {
-               "url": link,
+        source_id = self.connection.sources_table.insert_json(properties)
+        ResponseCache.get_object().bump(source_id)
+        return source_id
+
+    def get_new_properties(self, url, title="", language="", favicon=""):
+        return {
+               "url": url,
                "enabled" : True,
                "source_type" : "",
                "title" : title,
@@ -62,7 +75,42 @@ class Sources(object):
                "favicon": favicon,
        }
 
-        self.connection.sources_table.insert_json(properties)
+    def add_many(self, urls):
+        """
+        Inserts sources, which do not exist yet, by one INSERT ... SELECT statement.
+        Existing URLs are skipped by the statement itself, therefore the same URL is
+        not inserted twice, even by concurrent imports. URLs are passed as one JSON parameter.
+
+        Returns ids of inserted sources.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+        if not urls:
+            return []
+
+        table = self.connection.sources_table.get_table()
+
+        new_urls = func.json_each(json.dumps(urls)).table_valued("value").alias("new_urls")
+
+        properties = self.get_new_properties("")
+        names = [name for name in properties if name != "url"]
+
+        new_rows = (
+            select(new_urls.c.value, *[literal(properties[name]).label(name) for name in names])
+            .where(~exists().where(table.c.url == new_urls.c.value))
+        )
+        stmt = insert(table).from_select(["url"] + names, new_rows).returning(table.c.id, table.c.url)
+
+        try:
+            url_ids = {row.url: row.id for row in self.connection.connection.execute(stmt)}
+            self.connection.connection.commit()
+        except Exception:
+            self.connection.connection.rollback()
+            raise
+
+        if url_ids:
+            ResponseCache.get_object().bump()
+
+        return [url_ids[url] for url in urls if url in url_ids]
 
     def count(self):
         return self.connection.sources_table.count()
@@ -84,9 +132,110 @@ class Sources(object):
         self.remove_static_files(source)
 
         self.connection.sources_table.delete(id=id)
+        SourceCache.get_object().invalidate(self.connection.db_file, id=source.id)
+        ResponseCache.get_object().remove(source.id)
 
     def get(self,id):
-        return self.connection.sources_table.get(id=id)
+        """
+        Returns source. Sources are read from cache, if possible.
+        """
+        try:
+            id = int(id)
+        except (TypeError, ValueError):
+            return
+
+        cache = SourceCache.get_object()
+        source = cache.get(self.connection.db_file, id)
+        if source is None:
+            source = self.connection.sources_table.get(id=id)
+            if source is not None:
+                cache.set(self.connection.db_file, source)
+
+        return source
+
+    def get_by_url(self, url):
+        cache = SourceCache.get_object()
+        source = cache.get_by_url(self.connection.db_file, url)
+        if source is None:
+            source = next(self.connection.sources_table.get_where({"url":url}), None)
+            if source is not None:
+                cache.set(self.connection.db_file, source)
+
+        return source
+
+    def update(self, id, data):
+        self.connection.sources_table.update_json_data(id, data)
+        SourceCache.get_object().invalidate(self.connection.db_file, id=id)
+        ResponseCache.get_object().bump(id)
+
+    def truncate(self):
+        self.connection.sources_table.truncate()
+        SourceCache.get_object().clear(self.connection.db_file)
+        ResponseCache.get_object().bump()
+
+    def get_feed_source_ids(self, category_name=None, subcategory_name=None):
+        """
+        Returns ids of enabled sources, which belong to category and subcategory
+        """
+        table = self.connection.sources_table.get_table()
+
+        stmt = select(table.c.id).where(table.c.enabled == True).order_by(table.c.id)
+        if category_name:
+            stmt = stmt.where(table.c.category_name == category_name)
+        if subcategory_name:
+            stmt = stmt.where(table.c.subcategory_name == subcategory_name)
+
+        return [row.id for row in self.connection.connection.execute(stmt)]
+
+    def get_many(self, ids, chunk_size=500):
+        """
+        Returns map of id to source. Sources, which are not cached, are read
+        by one query per chunk of ids.
+        """
+        table = self.connection.sources_table.get_table()
+        cache = SourceCache.get_object()
+
+        sources = {}
+        missing_ids = []
+        for id in set(id for id in ids if id is not None):
+            source = cache.get(self.connection.db_file, id)
+            if source is None:
+                missing_ids.append(id)
+            else:
+                sources[id] = source
+
+        for index in range(0, len(missing_ids), chunk_size):
+            stmt = select(table).where(table.c.id.in_(missing_ids[index:index + chunk_size]))
+            for row in self.connection.connection.execute(stmt):
+                sources[row.id] = row
+                cache.set(self.connection.db_file, row)
+
+        return sources
+
+    def search(self, search=None, limit=None, offset=0, cursor=None):
+        """
+        Returns sources ordered by title
+        """
+        table = self.connection.sources_table.get_table()
+
+        stmt = select(table)
+        order_columns = self.get_order_columns()
+
+        if search:
+            stmt = stmt.where(or_(table.c.title.ilike(f"%{search}%"), table.c.url.ilike(f"%{search}%")))
+
+        return paginate(self.connection.connection, stmt, order_columns, limit, offset, cursor)
+
+    def search_page(self, search=None, limit=None, offset=0, cursor=None):
+        """
+        Returns tuple (sources, cursor of the next page)
+        """
+        sources = self.search(search, limit=limit, offset=offset, cursor=cursor)
+        return get_page(sources, self.get_order_columns(), limit)
+
+    def get_order_columns(self):
+        table = self.connection.sources_table.get_table()
+        return [table.c.title, table.c.id]
 
     def get_file_name(self, source):
         """
@@ -102,7 +251,13 @@ class Sources(object):
 
         return system.get_export_dir() / Path(file_name)
 
+    def get_rss_file_name(self, source):
+        system = System.get_object()
+        return system.get_export_dir() / "rss" / f"{source.id}.xml.gz"
+
     def remove_static_files(self, source):
-        path = self.get_file_name(source)
+        remove_file_with_gzip(self.get_file_name(source))
+
+        path = self.get_rss_file_name(source)
         if path.exists():
             path.unlink()
@@ -1,42 +1,42 @@
+from html import escape
 from pathlib import Path
 from .sources import Sources
 from .system import System
+from .filewriter import write_text_with_gzip
 
 
 class SourceWriter(object):
-    def __init__(self, connection, source):
+    def __init__(self, connection, source, limit=100):
         self.connection = connection
         self.source = source
+        self.limit = limit
 
     def write(self):
-        system = System.get_object()
-
-        html = self.get_html()
-        path = Path(system.get_export_dir())
-        if not path.exists():
-            path.mkdir()
-
-        path = self.get_file_name()
-        path.write_text(html)
+        write_text_with_gzip(self.get_file_name(), self.get_html())
 
     def get_file_name(self):
         sources = Sources(self.connection)
         path = Path(sources.get_file_name(self.source))
         return path
 
-    def get_html(self):
-        limit = 100
-        offset = 0
-        entries = self.connection.entries_table.get_where({"source_id" : self.source.id}, offset=offset, limit=limit)
+    def get_entries(self):
+        table = self.connection.entries_table.get_table()
+        order_by = [
+          table.c.date_published.desc(),
+          table.c.id.desc(),
+        ]
 
-        entries_html = ""
+        return self.connection.entries_table.get_where({"source_id" : self.source.id},
+                                                       order_by=order_by,
+                                                       limit=self.limit)
 
-        for entry in entries:
-            entries_html += self.get_entry_html(entry)
+    def get_html(self):
+        entries_html = "".join(self.get_entry_html(entry) for entry in self.get_entries())
 
         text = f"""
         <html>
         <body>
+            <h1>{escape(self.source.title or self.source.url)}</h1>
             <div>
             {entries_html}
             </div>
@@ -49,7 +49,6 @@ class SourceWriter(object):
     def get_entry_html(self, entry):
         return f"""
         <div>
-        {entry.link}
-        {entry.title}
+        <a href="{escape(entry.link)}">{escape(entry.title or entry.link)}</a>
         </div>
         """
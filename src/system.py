@@ -6,6 +6,7 @@ class System(object):
     instance = None
 
     def __init__(self):
+        self.export_dir = Path("export")
         self.set_thread_ok()
 
     def get_object():
@@ -31,5 +32,5 @@ class System(object):
         """
         TODO url to file name
         """
-        return Path("export")
+        return self.export_dir
 
@@ -1,78 +1,221 @@
-import re
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from webtoolkit import BaseUrl, RemoteUrl, PageRequestObject
 import traceback
 
 from .dbconnection import DbConnection
 from .controller import Controller
+from .entryrules import EntryRules
+from .entryfilter import EntryFilter, EntryFilters
+from .importqueue import ImportQueue
 from .system import System
-from .sourcedata import SourceData
+from .sourcedata import SourceData, calculate_body_hash
 from .sources import Sources
 from .entries import Entries
 from .sourcewriter import SourceWriter
+from .rsswriter import RssWriter
 from .applogging import AppLogging
+from .scheduler import SourceScheduler
+from .retention import Retention
 
 
 class TaskRunner(object):
-    def __init__(self, table_name):
+    def __init__(self, table_name, workers=5, max_entries=None):
         self.connection = None
         self.controller = None
         self.table_name = table_name
+        self.workers = max(int(workers), 1)
+        self.max_entries = max_entries
+        self.executor = None
 
         system = System.get_object()
         system.set_thread_ok()
 
-        self.waiting_due = None
+        self.scheduler = SourceScheduler()
+        self.wake_event = threading.Event()
         self.start_reading = True
+        self.cleanup_time = None
 
     def check_source(self, source):
+        url = self.prepare_source(source)
+        if not url:
+            return
+
+        response = self.fetch_url(url)
+        self.apply_response(source, url, response)
+
+    def prepare_source(self, source):
+        """
+        Marks source as read, and returns url object, which can be fetched.
+        Touches database, therefore has to be called from runner thread.
+        """
         sourcedata = SourceData(self.connection)
         sourcedata.mark_read(source)
+        self.scheduler.schedule_source(source, datetime.now())
 
-        url = self.get_source_url(source)
-        if not url:
-            return
+        return self.get_source_url(source)
 
-        response = url.get_response()
+    def fetch_url(self, url):
+        """
+        Network only. Can be called from worker threads.
+        """
+        return url.get_response()
+
+    def apply_response(self, source, url, response):
+        """
+        Writes fetch results. Has to be called from runner thread.
+        """
         if response:
-            if response.is_valid():
+            if response.get_status_code() == 304:
+                AppLogging(self.connection).debug(f"URL:{source.url} Not modified")
+            elif response.is_valid():
+                sourcedata = SourceData(self.connection)
+
+                body_hash = calculate_body_hash(response)
+                if not sourcedata.is_body_changed(source, body_hash):
+                    sourcedata.set_validators(source, response)
+                    AppLogging(self.connection).debug(f"URL:{source.url} Body not changed")
+                    return
+
                 source_properties = url.get_properties()
 
                 sources = Sources(self.connection)
                 sources.set(source.url, source_properties)
-                sources.delete_entries(source)
 
-                entries = url.get_entries()
-                for entry in entries:
-                    if self.is_entry_ok(entry, source):
-                        entries = Entries(self.connection)
-                        entries.add(entry, source)
+                entries = self.filter_entries(url.get_entries() or [], source)
+                Entries(self.connection).sync(entries, source)
+
+                # validators are stored only after entries are, otherwise failed ingestion would be answered by 304
+                sourcedata.set_validators(source, response)
+                sourcedata.set_body_hash(source, body_hash)
+
+                self.write_rss(source)
             else:
                 AppLogging(self.connection).error(f"URL:{source.url} Response is invalid")
-                time.sleep(5)
         else:
             AppLogging(self.connection).error(f"URL:{source.url} No response")
-            time.sleep(5)
 
-    def is_entry_ok(self, entry, source):
-        link = entry.get("link")
-        if not link:
+    def write_rss(self, source):
+        """
+        Stores RSS of source, which is then served by /rss/<source_id>
+        """
+        source = Sources(self.connection).get(source.id)
+        if not source:
+            return
+
+        try:
+            RssWriter(self.connection, source).write()
+        except Exception as E:
+            AppLogging(self.connection).exc(E, f"URL:{source.url} Cannot write RSS")
+
+    def read_sources(self, sources):
+        """
+        Fetches sources concurrently, by worker threads.
+        Database writes are applied serially, from this thread, as fetches complete.
+
+        Only a few fetches per worker are in flight. Source is prepared when its fetch
+        is submitted, and its response is dropped once it is written.
+        """
+        system = System.get_object()
+
+        count = len(sources)
+        sources = iter(sources)
+
+        futures = {}
+        index = 0
+        while True:
+            while len(futures) < self.get_max_in_flight():
+                source = next(sources, None)
+                if source is None:
+                    break
+
+                url = self.prepare_source(source)
+                if url:
+                    future = self.executor.submit(self.fetch_url, url)
+                    futures[future] = (source, url)
+
+            if not futures:
+                break
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, url = futures.pop(future)
+                index += 1
+
+                if self.apply_future(source, url, future):
+                    AppLogging(self.connection).debug(f"{index}/{count} {source.url} {source.title}: Reading DONE")
+                    system.set_thread_ok()
+
+    def apply_future(self, source, url, future):
+        """
+        Writes result of fetch. Returns False, if it failed.
+        """
+        try:
+            response = future.result()
+        except Exception as E:
+            AppLogging(self.connection).exc(E, f"URL:{source.url} Fetch error ")
             return False
 
-        if source.xpath:
-            try:
-                if re.search(source.xpath, link) is None:
-                    return False
-            except re.error as E:
-                AppLogging(self.connection).exc(E, "Incorrect pattern")
-                return False
+        try:
+            self.apply_response(source, url, response)
+        except Exception as E:
+            # source is already scheduled, other sources of the batch are still written
+            self.connection.connection.rollback()
+            AppLogging(self.connection).exc(E, f"URL:{source.url} Cannot write response ")
+            return False
 
         return True
 
+    def get_max_in_flight(self):
+        """
+        Number of fetches, which are submitted, and not written yet
+        """
+        return self.workers * 2
+
+    def get_batch_size(self):
+        """
+        Number of due sources, which are read in one pass
+        """
+        return self.workers * 10
+
+    def is_entry_ok(self, entry, source):
+        return len(self.filter_entries([entry], source)) == 1
+
+    def filter_entries(self, entries, source):
+        """
+        Returns entries, which pass source filter, and are not blocked by entry rules
+        """
+        entries = [entry for entry in entries if entry.get("link")]
+        entries = self.get_entry_filter(source).filter(entries)
+
+        if self.connection is not None and entries:
+            matcher = EntryRules.get_matcher(self.connection)
+            entries = [entry for entry in entries if not matcher.is_entry_triggered(entry)]
+
+        return entries
+
+    def get_entry_filter(self, source):
+        """
+        Filter is compiled once, errors are logged only when it is compiled
+        """
+        spec = source.xpath or ""
+
+        filters = EntryFilters.get_object()
+        entry_filter = filters.get(spec)
+        if entry_filter is None:
+            entry_filter = EntryFilter(spec)
+            for pattern, E in entry_filter.errors:
+                AppLogging(self.connection).exc(E, f"URL:{source.url} Incorrect pattern {pattern} ")
+            filters.set(spec, entry_filter)
+
+        return entry_filter
+
     def get_source_url(self, source):
         request = PageRequestObject(source.url)
         request.timeout_s = 300
+        request.request_headers = SourceData(self.connection).get_request_headers(source)
 
         config = self.connection.configurationentry.get()
         try:
@@ -146,57 +289,103 @@ class TaskRunner(object):
     def process_sources(self):
         self.connection = DbConnection(self.table_name)
         self.controller = Controller(connection=self.connection)
+        self.scheduler.load(self.connection)
         self.add_due_sources()
         self.controller.close()
         self.connection.close()
 
         print("Starting reading")
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch")
         while True:
             try:
                 system = System.get_object()
 
                 self.start_reading = False
 
-                source_ids = self.get_sources_ids()
+                if not self.process_due_sources():
+                    self.wait_for_due_time()
+                    continue
+
+                system.set_thread_ok()
+            except Exception as E:
+                AppLogging(self.connection).error("Exception {}".format(str(E)))
+                time.sleep(1)
+
+    def process_due_sources(self):
+        """
+        Reads batch of sources, which are due. Returns False, if there were none.
+        """
+        source_ids = self.scheduler.pop_due(limit=self.get_batch_size())
+        if len(source_ids) == 0:
+            return False
 
-                no_source_read = True
-                for index, source_id in enumerate(source_ids):
-                    self.connection = DbConnection(self.table_name)
-                    self.controller = Controller(connection=self.connection)
+        try:
+            self.connection = DbConnection(self.table_name)
+            self.controller = Controller(connection=self.connection)
 
-                    if self.process_source(index, source_id, len(source_ids)):
-                        no_source_read = False
+            due_sources = []
+            for index, source_id in enumerate(source_ids):
+                source = self.process_source(index, source_id, len(source_ids))
+                if source:
+                    due_sources.append(source)
 
-                    self.add_due_sources()
+            self.read_sources(due_sources)
 
-                    self.controller.close()
-                    self.connection.close()
-                    system.set_thread_ok()
+            self.add_due_sources()
 
-                system.set_thread_ok()
+            if self.is_cleanup_needed():
+                self.cleanup()
 
-                if no_source_read:
-                    self.waiting_due = datetime.now() + self.get_due_time()
-                    self.wait_for_due_time()
+            self.controller.close()
+            self.connection.close()
+        except Exception:
+            # popped sources, which were not scheduled again, would not be read until restart
+            self.scheduler.schedule_missing(source_ids, datetime.now())
+            raise
 
-                self.connection = DbConnection(self.table_name)
-                self.controller = Controller(connection=self.connection)
+        return True
 
-                entries = Entries(self.connection)
-                entries.cleanup()
-                sources_data = SourceData(self.connection)
-                sources_data.cleanup()
+    def get_cleanup_period(self):
+        return timedelta(hours = 1)
 
-                self.controller.close()
-                self.connection.close()
-            except Exception as E:
-                AppLogging(self.connection).error("Exception {}".format(str(E)))
-                time.sleep(1)
+    def is_cleanup_needed(self):
+        if self.cleanup_time is None:
+            return True
+        return datetime.now() - self.cleanup_time >= self.get_cleanup_period()
+
+    def cleanup(self):
+        """
+        Removes data of sources, which do not exist, and expired entries
+        """
+        self.cleanup_time = datetime.now()
+
+        entries_removed = Entries(self.connection).cleanup()
+        op_data_removed = SourceData(self.connection).cleanup()
+
+        if entries_removed or op_data_removed:
+            AppLogging(self.connection).info(f"Cleanup removed entries:{entries_removed} operational data:{op_data_removed}")
+
+        retention = Retention(self.connection)
+        report = retention.run(max_entries=self.max_entries)
+        if report["rows"]:
+            AppLogging(self.connection).info(f"Retention removed entries:{report['rows']} bytes:{report['bytes']} sources:{report['sources']}")
+
+            for source_id in retention.source_ids:
+                source = Sources(self.connection).get(source_id)
+                if source:
+                    self.write_rss(source)
 
-    def get_due_time(self):
-        return timedelta(minutes = 10)
+    def get_heartbeat_time(self):
+        """
+        Waiting thread wakes up at least that often, to report it is alive,
+        and to check if there are new sources.
+        """
+        return timedelta(minutes = 1)
 
     def wait_for_due_time(self):
+        """
+        Sleeps until the earliest source is due, or until new sources are added
+        """
         system = System.get_object()
         while True:
             system.set_thread_ok()
@@ -204,73 +393,82 @@ class TaskRunner(object):
             if self.start_reading:
                 return True
 
-            if datetime.now() < self.waiting_due:
-                time.sleep(10)
-            else:
-                self.start_reading = True
+            wait_time = self.scheduler.get_wait_time()
+            if wait_time is not None and wait_time.total_seconds() <= 0:
                 return True
 
-    def get_sources_ids(self):
-        """
-        we assume that we have a small number of sources
-        """
-        self.connection = DbConnection(self.table_name)
-        self.controller = Controller(connection=self.connection)
+            timeout = self.get_heartbeat_time()
+            if wait_time is not None:
+                timeout = min(wait_time, timeout)
 
-        sources = Sources(self.connection)
-        source_count = sources.count()
+            is_woken = self.wake_event.wait(timeout=timeout.total_seconds())
+            if is_woken:
+                self.wake_event.clear()
 
-        source_ids = []
-        for source in self.connection.sources_table.get_sources():
-            source_ids.append(source.id)
+            self.connection = DbConnection(self.table_name)
+            self.controller = Controller(connection=self.connection)
+            self.add_due_sources()
+            self.controller.close()
+            self.connection.close()
 
-        self.controller.close()
-        self.connection.close()
+            if is_woken:
+                return True
 
-        return source_ids
+    def wake(self):
+        """
+        Can be called from other threads, to stop waiting
+        """
+        self.start_reading = True
+        self.wake_event.set()
 
     def process_source(self, index, source_id, source_count):
+        """
+        Returns source, if it should be read
+        """
         sources = Sources(self.connection)
         source = sources.get(id=source_id)
 
         if not source:
             AppLogging(self.connection).debug(f"Source id: {source_id} Could not find source")
-            return False
+            return
 
         if not source.enabled:
             AppLogging(self.connection).debug(f"Source id: {source_id} Source is not enabled")
-            return False
+            self.scheduler.schedule_source(source, datetime.now())
+            return
 
         if self.controller.is_entry_rule_triggered(source.url):
             sources = Sources(connection=self.connection)
             sources.delete(id=source.id)
-            return False
-
-        sources_data = SourceData(self.connection)
-
-        if not sources_data.is_update_needed(source):
-            now = datetime.now()
-            AppLogging(self.connection).debug(f"{source.url}: Update not needed @ {now}")
-            return False
+            return
 
         AppLogging(self.connection).debug(f"{index}/{source_count} {source.url} {source.title}: Reading")
-        self.check_source(source)
 
         #writer = SourceWriter(connection=self.connection, source=source)
         #writer.write()
 
-        AppLogging(self.connection).debug(f"{index}/{source_count} {source.url} {source.title}: Reading DONE")
-        time.sleep(1)
-
-        return True
+        return source
 
     def add_due_sources(self):
+        """
+        Runs queued source imports. New sources are scheduled to be read right away.
+        """
         status = False
 
-        sources = self.controller.get_sources_to_add()
-        if sources:
+        queue = ImportQueue.get_object()
+        while True:
+            job = queue.pop()
+            if job is None:
+                break
+
             self.start_reading = True
-            self.controller.add_sources(sources)
+            for source_id in self.controller.run_import(job):
+                self.scheduler.schedule(source_id, datetime.now())
             status = True
 
+            if job.error:
+                AppLogging(self.connection).error(f"Import {job.id} failed: {job.error}")
+            else:
+                AppLogging(self.connection).info(f"Import {job.id} added:{job.added} existing:{job.existing} blocked:{job.blocked}")
+
         return status
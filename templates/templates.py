@@ -1,20 +1,34 @@
 PAGINATION="""
-<div class="pagination">
+{% if pagination %}
+<div id="pagination">
+<nav>
+<ul class="pagination">
+    {% if pagination.first %}
+    <a href="{{ pagination.first }}" class="btnNavigation page-link">|&lt;</a>
+    {% endif %}
+    {% if pagination.prev %}
+    <a href="{{ pagination.prev }}" class="btnNavigation page-link">&lt;</a>
+    {% endif %}
+    {% if pagination.next %}
     <li class="page-item">
-       <a href="{{ entries_page }}?p={{ prev_page }}" class="btnNavigation page-link">&lt;</a>
-    </li>
-    <li class="page-item">
-       <a href="{{ entries_page }}?p={{ next_page }}" class="btnNavigation page-link">&gt;</a>
+       <a href="{{ pagination.next }}" class="btnNavigation page-link">&gt;</a>
     </li>
+    {% endif %}
+</ul>
+</nav>
 </div>
+{% endif %}
 """
 
-def get_view(body, title=""):
+def get_view(body):
+    """
+    Wraps view body in page. Page title is template variable.
+    """
     text = """
 <!doctype html>
 <html>
 <head>
-    <title>{title}</title>
+    <title>{{ title }}</title>
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH" crossorigin="anonymous">
     <link  href="styles/viewerzip.css?i=90" rel="stylesheet" crossorigin="anonymous">
@@ -28,7 +42,6 @@ def get_view(body, title=""):
 </body>
 </html>
 """
-    text = text.replace("{title}", title)
     return text.replace("{body}", body)
 
 
@@ -100,7 +113,16 @@ STR_TEMPLATE = """
         <button class="btn btn-primary" onclick="history.back()">Go back</button>
         <a class="btn btn-primary" href="/">Home</a>
     </div>
-    {template_string}
+    {{ template_string }}
+"""
+
+
+IMPORT_TEMPLATE = """
+    <div class="nav-buttons">
+        <button class="btn btn-primary" onclick="history.back()">Go back</button>
+        <a class="btn btn-primary" href="/">Home</a>
+    </div>
+    Sources are being added. Progress: <a href="/api/import/{{ job.id }}">/api/import/{{ job.id }}</a>
 """
 
 
@@ -196,7 +218,7 @@ SOURCES_LIST_TEMPLATE = """
 
 <form method="GET">
   <label for="search">Search</label></br>
-  <input type="search" id="search" name="search" value="{{search_value}}"/>
+  <input type="search" id="search" name="search" value="{{ search_value or "" }}"/>
   <button type="submit">Search</button>
 </form>
 
@@ -225,7 +247,7 @@ SOURCES_LIST_TEMPLATE = """
     {% endfor %}
 </div>
 
-{{pagination_text}}
+{% include "pagination.html" %}
 """
 
 
@@ -247,8 +269,8 @@ SOURCE_TEMPLATE = """
 <form method="POST">
     <div><label for="fetch_period">Fetch period</label></div>
     <div><input type="search" id="fetch_period" name="fetch_period" value="{{source_item.fetch_period}}"/></div>
-    <div><label for="xpath">Link acceptance 're' expression</label></div>
-    <div><input type="search" id="xpath" name="xpath" value="{{source_item.xpath}}"/></div>
+    <div><label for="xpath">Entry filters, one 're' expression per line: [!][link:|title:|description:]expression</label></div>
+    <div><textarea id="xpath" name="xpath">{{source_item.xpath}}</textarea></div>
     <button type="submit">Save</button>
 </form>
 """
@@ -290,7 +312,13 @@ DEFINE_ENTRY_RULES_TEMPLATE = """
 Will block sources, and entries.
 
 <form method="POST">
-    <p>The URLs/feeds below will be blocked. One source URL per line:</p>
+    <p>The URLs/feeds below will be blocked. One rule per line:</p>
+    <ul>
+        <li>https://example.com/feed - exact URL</li>
+        <li>https://example.com/videos/* - URLs starting with the prefix</li>
+        <li>example.com - host, and its subdomains</li>
+        <li>text:sponsored - entries with the text in title, or description</li>
+    </ul>
     <textarea name="sources">
 {{raw_data}}
     </textarea>
@@ -307,7 +335,23 @@ LOGS_TEMPLATE = """
     <a class="btn btn-primary" href="/remove-all-logs">Clear</a>
 </div>
 
-<h1>Logs {{sources_length}}</h1>
+<h1>Logs</h1>
+
+<form method="GET">
+  <label for="level">Level</label>
+  <select id="level" name="level">
+    {% for level_name, level_value in levels.items() %}
+      <option value="{{ level_value }}" {% if filters.level == level_value|string %}selected{% endif %}>{{ level_name }}</option>
+    {% endfor %}
+  </select>
+  <label for="date_from">From</label>
+  <input type="datetime-local" id="date_from" name="date_from" value="{{ filters.date_from or "" }}"/>
+  <label for="date_to">To</label>
+  <input type="datetime-local" id="date_to" name="date_to" value="{{ filters.date_to or "" }}"/>
+  <label for="search">Search</label>
+  <input type="search" id="search" name="search" value="{{ filters.search or "" }}"/>
+  <button type="submit">Search</button>
+</form>
 
 <div>
     {% for log in logs %}
@@ -322,7 +366,7 @@ LOGS_TEMPLATE = """
     {% endfor %}
 </div>
 
-{{pagination_text}}
+{% include "pagination.html" %}
 """
 
 
@@ -445,3 +489,30 @@ Unfortunately, no one can be told what the Matrix is. You have to see it for you
 </html>
 """
 
+
+VIEWS = {
+    "index.html": INDEX_TEMPLATE,
+    "ok.html": OK_TEMPLATE,
+    "nok.html": NOK_TEMPLATE,
+    "str.html": STR_TEMPLATE,
+    "entries.html": ENTRIES_LIST_TEMPLATE,
+    "sources.html": SOURCES_LIST_TEMPLATE,
+    "source.html": SOURCE_TEMPLATE,
+    "add_sources.html": ADD_SOURCES_TEMPLATE,
+    "import.html": IMPORT_TEMPLATE,
+    "entry_rules.html": DEFINE_ENTRY_RULES_TEMPLATE,
+    "logs.html": LOGS_TEMPLATE,
+    "stats.html": STATS_TEMPLATE,
+    "configuration.html": CONFIGURATION_TEMPLATE,
+}
+
+
+def get_templates():
+    """
+    Returns map of template name to template text.
+    Views are wrapped in page, other templates are used as they are.
+    """
+    templates = {name: get_view(body) for name, body in VIEWS.items()}
+    templates["project.html"] = PROJECT_TEMPLATE
+    templates["pagination.html"] = PAGINATION
+    return templates
@@ -0,0 +1,55 @@
+"""
+Measures cost of DbConnection() construction, and the first query.
+
+"cold" drops shared engines and reflected schema before every construction,
+which is how every connection was created before they were shared.
+
+Run: python tests/bench_dbconnection.py
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.dbconnection import DbConnection
+from testdb import create_test_db
+
+
+def measure(table_name, iterations, cold):
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        if cold:
+            DbConnection.dispose_engines()
+            DbConnection.refresh_schema()
+
+        connection = DbConnection(table_name)
+        connection.sources_table.count()
+        list(connection.entries_table.get_where(limit=1))
+        connection.close()
+
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = 200
+
+    with tempfile.TemporaryDirectory() as directory:
+        table_name = create_test_db(Path(directory) / "bench.db")
+        DbConnection(table_name).close()
+
+        cold = measure(table_name, iterations, cold=True)
+        warm = measure(table_name, iterations, cold=False)
+
+        DbConnection.dispose_engines()
+
+    print(f"DbConnection() cold: {cold * 1000:.3f} ms")
+    print(f"DbConnection() shared: {warm * 1000:.3f} ms")
+    print(f"Speedup: {cold / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
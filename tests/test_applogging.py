@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.dbconnection import DbConnection
+from src.applogging import AppLogging, LogWriter
+from testdb import create_test_db
+
+
+class AppLoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+        self.writer = LogWriter(background=False)
+        LogWriter.instance, self.previous_writer = self.writer, LogWriter.instance
+
+    def tearDown(self):
+        LogWriter.instance = self.previous_writer
+        AppLogging.max_log_entries = 2000
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_create_entry__queued(self):
+        logging = AppLogging(self.connection)
+
+        # call tested function
+        logging.info("Info")
+        logging.error("Error")
+
+        self.assertEqual(self.connection.applogging.count(), 0)
+        self.writer.flush()
+        self.assertEqual(self.connection.applogging.count(), 2)
+
+    def test_cleanup_overflow(self):
+        AppLogging.max_log_entries = 5
+        logging = AppLogging(self.connection)
+
+        # call tested function
+        for index in range(12):
+            logging.info(f"Info {index}")
+        self.writer.flush()
+
+        rows = list(self.connection.applogging.get_where())
+        self.assertEqual([row.info_text for row in rows], [f"Info {index}" for index in range(7, 12)])
@@ -0,0 +1,45 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.dbconnection import DbConnection
+from testdb import create_test_db
+
+
+class DbConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def insert_entries(self, rows):
+        connection = sqlite3.connect(self.table_name)
+        connection.executemany("INSERT INTO linkdatamodel (link, title, bookmarked, permanent) VALUES (?, ?, ?, ?);", rows)
+        connection.commit()
+        connection.close()
+
+    def test_upgrade_schema__duplicates(self):
+        self.insert_entries([
+            ("https://a.com", "old", 0, 0),
+            ("https://a.com", "bookmarked", 1, 0),
+            ("https://b.com", "old", 0, 0),
+            ("https://b.com", "new", 0, 0),
+            ("https://c.com", "permanent", 0, 1),
+            ("https://c.com", "new", 0, 0),
+        ])
+
+        # call tested function
+        connection = DbConnection(self.table_name)
+
+        rows = connection.connection.exec_driver_sql("SELECT link, title FROM linkdatamodel ORDER BY link;").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [
+            ("https://a.com", "bookmarked"),
+            ("https://b.com", "old"),
+            ("https://c.com", "permanent"),
+        ])
+
+        connection.close()
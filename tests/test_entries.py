@@ -0,0 +1,250 @@
+import tempfile
+import unittest
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+
+from src.dbconnection import DbConnection
+from src.entries import Entries
+from src.sources import Sources
+from src.retention import Retention
+from testdb import create_test_db
+
+
+def get_entry_jsons(title="Title"):
+    return [
+        {
+            "link": "https://one.com/1",
+            "title": title,
+            "description": "Description",
+            "date_published": datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc),
+            "bookmarked": False,
+            "feed_entry": object(),
+            "tags": None,
+        },
+        {
+            "link": "https://one.com/2",
+            "title": "Second",
+            "description": "Description",
+            "date_published": datetime(2024, 1, 2, 10, 0, tzinfo=timezone.utc),
+            "bookmarked": False,
+        },
+    ]
+
+
+class EntriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+
+        # entries of fixtures are old, they are kept
+        source_id = Sources(self.connection).set("https://one.com/feed")
+        Sources(self.connection).update(source_id, {"remove_after_days": 0})
+        self.source = self.connection.sources_table.get(source_id)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_sync__insert(self):
+        entries = Entries(self.connection)
+
+        # call tested function
+        self.assertEqual(entries.sync(get_entry_jsons(), self.source), (2, 0))
+
+        self.assertEqual(entries.count(), 2)
+
+    def test_sync__unchanged(self):
+        entries = Entries(self.connection)
+        entries.sync(get_entry_jsons(), self.source)
+        stored = list(self.connection.entries_table.get_where())
+
+        # call tested function
+        self.assertEqual(entries.sync(get_entry_jsons(), self.source), (0, 0))
+
+        self.assertEqual(list(self.connection.entries_table.get_where()), stored)
+
+    def test_sync__expired(self):
+        entries = Entries(self.connection)
+        Sources(self.connection).update(self.source.id, {"remove_after_days": 5})
+        source = self.connection.sources_table.get(self.source.id)
+
+        now = datetime.now()
+        entry_jsons = [
+            {"link": "https://one.com/old", "date_published": now - timedelta(days=10)},
+            {"link": "https://one.com/new", "date_published": now - timedelta(days=1)},
+            {"link": "https://one.com/undated"},
+        ]
+
+        # call tested function
+        self.assertEqual(entries.sync(entry_jsons, source), (2, 0))
+
+        Retention(self.connection, pause_s=0).run()
+
+        # call tested function
+        self.assertEqual(entries.sync(entry_jsons, source), (0, 0))
+
+        self.assertEqual(sorted(entry.link for entry in self.connection.entries_table.get_where()),
+                         ["https://one.com/new", "https://one.com/undated"])
+
+    def test_sync__changed(self):
+        entries = Entries(self.connection)
+        entries.sync(get_entry_jsons(), self.source)
+        stored = self.connection.entries_table.get(1)
+
+        # call tested function
+        self.assertEqual(entries.sync(get_entry_jsons(title="New title"), self.source), (0, 1))
+
+        entry = self.connection.entries_table.get(1)
+        self.assertEqual(entry.title, "New title")
+        self.assertEqual(entry.date_created, stored.date_created)
+        self.assertIsNotNone(entry.date_update_last)
+
+    def test_add_many__single_commit(self):
+        entries = Entries(self.connection)
+        entry_jsons = [{"link": f"https://one.com/{index}", "title": "Title"} for index in range(500)]
+
+        commits = []
+        event.listen(self.connection.connection, "commit", lambda connection: commits.append(1))
+
+        # call tested function
+        entries.add_many(entry_jsons, self.source)
+
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(entries.count(), 500)
+
+    def test_add_many__existing_link(self):
+        entries = Entries(self.connection)
+        entries.add_many([{"link": "https://one.com/1", "title": "Title"}], self.source)
+        stored = self.connection.entries_table.get(1)
+
+        # call tested function
+        entries.add_many([{"link": "https://one.com/1", "title": "Title"}], self.source)
+
+        self.assertEqual(self.connection.entries_table.get(1), stored)
+
+        # call tested function
+        entries.add_many([{"link": "https://one.com/1", "title": "New title"}], self.source)
+
+        entry = self.connection.entries_table.get(1)
+        self.assertEqual(entries.count(), 1)
+        self.assertEqual(entry.title, "New title")
+        self.assertEqual(entry.date_created, stored.date_created)
+
+    def test_search(self):
+        entries = Entries(self.connection)
+        entries.add_many([
+            {"link": "https://one.com/1", "title": "Python release notes", "description": "Changes"},
+            {"link": "https://one.com/2", "title": "Rust", "description": "Python bindings for rust"},
+            {"link": "https://two.com/3", "title": "Go", "description": "Nothing"},
+        ], self.source)
+
+        # call tested function
+        links = [entry.link for entry in entries.search("pyth")]
+        self.assertEqual(sorted(links), ["https://one.com/1", "https://one.com/2"])
+
+        # call tested function
+        links = [entry.link for entry in entries.search("title=python")]
+        self.assertEqual(links, ["https://one.com/1"])
+
+        # call tested function
+        links = [entry.link for entry in entries.search("link=two.com")]
+        self.assertEqual(links, ["https://two.com/3"])
+
+        # call tested function
+        links = [entry.link for entry in entries.search('"unbalanced')]
+        self.assertEqual(links, [])
+
+    def test_search__updated(self):
+        entries = Entries(self.connection)
+        entries.add_many([{"link": "https://one.com/1", "title": "Old"}], self.source)
+        entries.add_many([{"link": "https://one.com/1", "title": "New"}], self.source)
+
+        # call tested function
+        self.assertEqual(list(entries.search("old")), [])
+        self.assertEqual(len(list(entries.search("new"))), 1)
+
+        entries.delete(1)
+
+        # call tested function
+        self.assertEqual(list(entries.search("new")), [])
+
+    def test_search_page__cursor(self):
+        entries = Entries(self.connection)
+
+        entry_jsons = []
+        for index in range(250):
+            date_published = None
+            if index % 5:
+                date_published = datetime(2024, 1, 1 + index % 3, 10, 0)
+            entry_jsons.append({"link": f"https://one.com/{index}", "date_published": date_published})
+        entries.add_many(entry_jsons, self.source)
+
+        expected = [entry.id for entry in entries.search()]
+
+        ids = []
+        cursor = None
+        while True:
+            # call tested function
+            page, cursor = entries.search_page(limit=100, cursor=cursor)
+
+            ids.extend(entry.id for entry in page)
+            if not cursor:
+                break
+
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(set(ids)), 250)
+
+        page, cursor = entries.search_page(limit=100, offset=200)
+        self.assertEqual([entry.id for entry in page], expected[200:])
+        self.assertIsNone(cursor)
+
+    def test_get_feed_rows(self):
+        entries = Entries(self.connection)
+        entries.add_many(get_entry_jsons(), self.source)
+
+        # call tested function
+        rows = list(entries.get_feed_rows(self.source.id, limit=1))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].link, "https://one.com/2")
+        self.assertEqual(list(rows[0]._fields), list(Entries.feed_fields))
+
+    def test_get_merged_feed_rows(self):
+        entries = Entries(self.connection)
+        entries.add_many(get_entry_jsons(), self.source)
+
+        source_id = Sources(self.connection).set("https://two.com/feed")
+        source = self.connection.sources_table.get(source_id)
+        entries.add_many([
+            {"link": "https://two.com/1", "date_published": datetime(2024, 1, 1, 12, 0)},
+            {"link": "https://two.com/2"},
+        ], source)
+
+        statements = []
+        event.listen(self.connection.engine,
+                     "before_cursor_execute",
+                     lambda connection, cursor, statement, parameters, context, executemany: statements.append(statement))
+
+        # call tested function
+        rows = list(entries.get_merged_feed_rows([self.source.id] + list(range(1000, 1399)) + [source_id], limit=3))
+
+        # one query for each batch of 200 sources
+        self.assertEqual(len(statements), 3)
+        self.assertEqual([row.link for row in rows], ["https://one.com/2", "https://two.com/1", "https://one.com/1"])
+
+    def test_cleanup(self):
+        entries = Entries(self.connection)
+        entries.add_many(get_entry_jsons(), self.source)
+
+        source_id = Sources(self.connection).set("https://two.com/feed")
+        source = self.connection.sources_table.get(source_id)
+        entries.add_many([{"link": f"https://two.com/{index}"} for index in range(5)], source)
+        self.connection.sources_table.delete(id=source_id)
+
+        # call tested function
+        self.assertEqual(entries.cleanup(chunk_size=2), 5)
+
+        self.assertEqual(entries.count(), 2)
@@ -0,0 +1,69 @@
+import unittest
+
+from src.entryfilter import EntryFilter, EntryFilters
+
+
+class EntryFilterTest(unittest.TestCase):
+
+    def get_entries(self):
+        return [
+            {"link": "https://youtube.com/watch?v=1", "title": "Python news", "description": "Release"},
+            {"link": "https://youtube.com/shorts/2", "title": "Python short", "description": ""},
+            {"link": "https://github.com/3", "title": "Sponsored", "description": "Ad"},
+        ]
+
+    def test_filter__link(self):
+        entry_filter = EntryFilter(".*youtube.com.*")
+
+        # call tested function
+        entries = entry_filter.filter(self.get_entries())
+
+        self.assertEqual([entry["link"] for entry in entries],
+                         ["https://youtube.com/watch?v=1", "https://youtube.com/shorts/2"])
+
+    def test_filter__include_exclude(self):
+        entry_filter = EntryFilter("title:Python\n!link:/shorts/")
+
+        # call tested function
+        entries = entry_filter.filter(self.get_entries())
+
+        self.assertEqual([entry["link"] for entry in entries], ["https://youtube.com/watch?v=1"])
+
+    def test_filter__exclude_only(self):
+        entry_filter = EntryFilter("!title:Sponsored\n!description:^Ad$")
+
+        # call tested function
+        entries = entry_filter.filter(self.get_entries())
+
+        self.assertEqual(len(entries), 2)
+
+    def test_filter__empty(self):
+        entry_filter = EntryFilter("")
+
+        # call tested function
+        entries = entry_filter.filter(self.get_entries())
+
+        self.assertEqual(len(entries), 3)
+
+    def test_filter__incorrect_pattern(self):
+        entry_filter = EntryFilter("youtube(")
+
+        # call tested function
+        entries = entry_filter.filter(self.get_entries())
+
+        self.assertEqual(entries, [])
+        self.assertEqual(len(entry_filter.errors), 1)
+
+    def test_filters__cache(self):
+        filters = EntryFilters(max_size=2)
+        filters.set("a", EntryFilter("a"))
+        filters.set("b", EntryFilter("b"))
+
+        # call tested function
+        self.assertIsNotNone(filters.get("a"))
+
+        filters.set("c", EntryFilter("c"))
+
+        self.assertIsNone(filters.get("b"))
+        self.assertIsNotNone(filters.get("a"))
+        self.assertEqual(filters.count(), 2)
@@ -0,0 +1,124 @@
+import tempfile
+import unittest
+from pathlib import Path
+from sqlalchemy import event
+
+from src.dbconnection import DbConnection
+from src.controller import Controller
+from src.entryrules import EntryRules, TextAutomaton
+from testdb import create_test_db
+
+
+class EntryRulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+        self.controller = Controller(self.connection)
+
+    def tearDown(self):
+        EntryRules.invalidate(self.connection.db_file)
+        self.connection.close()
+        self.directory.cleanup()
+
+    def count_queries(self):
+        statements = []
+        event.listen(self.connection.engine,
+                     "before_cursor_execute",
+                     lambda connection, cursor, statement, parameters, context, executemany: statements.append(statement))
+        return statements
+
+    def test_is_entry_rule_triggered(self):
+        self.controller.add_entry_rules("\n".join([
+            "https://blocked.com/feed.xml",
+            "https://prefix.com/videos/*",
+        ]))
+
+        # call tested function
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://blocked.com/feed.xml"))
+        self.assertFalse(self.controller.is_entry_rule_triggered("https://blocked.com/other.xml"))
+
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://prefix.com/videos/1"))
+        self.assertFalse(self.controller.is_entry_rule_triggered("https://prefix.com/music/1"))
+
+    def test_is_entry_rule_triggered__host(self):
+        self.controller.add_entry_rules("spam.org")
+
+        # call tested function
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://spam.org/feed"))
+        self.assertTrue(self.controller.is_entry_rule_triggered("http://spam.org"))
+
+        # host rule blocks also subdomains
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://www.spam.org/feed"))
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://a.b.spam.org/feed"))
+
+        self.assertFalse(self.controller.is_entry_rule_triggered("https://notspam.org/feed"))
+        self.assertFalse(self.controller.is_entry_rule_triggered("https://spam.org.other.com/feed"))
+        self.assertFalse(self.controller.is_entry_rule_triggered("https://other.com/spam.org"))
+
+    def test_is_entry_triggered(self):
+        self.controller.add_entry_rules("\n".join([
+            "spam.org",
+            "text:Sponsored",
+        ]))
+
+        # call tested function
+        self.assertTrue(self.controller.is_entry_triggered({"link": "https://spam.org/1"}))
+        self.assertTrue(self.controller.is_entry_triggered({"link": "https://ok.org/1", "title": "This is sponsored content"}))
+        self.assertTrue(self.controller.is_entry_triggered({"link": "https://ok.org/1", "description": "SPONSORED"}))
+        self.assertFalse(self.controller.is_entry_triggered({"link": "https://ok.org/1", "title": "Regular"}))
+
+    def test_matcher__rebuilt_after_rules_change(self):
+        self.controller.add_entry_rules("https://blocked.com")
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://blocked.com"))
+
+        statements = self.count_queries()
+
+        # call tested function
+        for index in range(100):
+            self.controller.is_entry_rule_triggered(f"https://other.com/{index}")
+
+        self.assertEqual(len(statements), 0)
+
+        self.controller.add_entry_rules("https://other.com/1")
+
+        # call tested function
+        self.assertFalse(self.controller.is_entry_rule_triggered("https://blocked.com"))
+        self.assertTrue(self.controller.is_entry_rule_triggered("https://other.com/1"))
+
+    def test_get_matcher__invalidated_while_compiled(self):
+        self.controller.add_entry_rules("https://old.com")
+
+        get_where = self.connection.entry_rules.get_where
+
+        def get_old_rules(*args, **kwargs):
+            rows = list(get_where(*args, **kwargs))
+            # rules change, while old ones are compiled
+            EntryRules.invalidate(self.connection.db_file)
+            return iter(rows)
+
+        self.connection.entry_rules.get_where = get_old_rules
+        try:
+            # call tested function
+            EntryRules.get_matcher(self.connection)
+        finally:
+            self.connection.entry_rules.get_where = get_where
+
+        self.assertNotIn(str(self.connection.db_file), EntryRules.matchers)
+
+    def test_get_rule_urls(self):
+        self.controller.add_entry_rules("https://blocked.com\ntext:sponsored")
+
+        # call tested function
+        urls = self.controller.get_rule_urls()
+
+        self.assertEqual(sorted(urls), ["https://blocked.com", "text:sponsored"])
+
+    def test_text_automaton(self):
+        automaton = TextAutomaton(["he", "she", "his", "hers"])
+
+        # call tested function
+        found = sorted(automaton.find("Ushers"))
+
+        self.assertEqual(found, [0, 1, 3])
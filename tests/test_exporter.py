@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.dbconnection import DbConnection
+from src.entries import Entries
+from src.sources import Sources
+from src.system import System
+from src.exporter import Exporter
+from testdb import create_test_db
+
+
+class ExporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        System.get_object().export_dir = Path(self.directory.name) / "export"
+
+        self.connection = DbConnection(self.table_name)
+        sources = Sources(self.connection)
+        for index in range(3):
+            source_id = sources.set(f"https://source{index}.com")
+            Entries(self.connection).add_many([{"link": f"https://source{index}.com/1", "title": "<One>"}], sources.get(source_id))
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_export(self):
+        exporter = Exporter(self.table_name, workers=2)
+
+        # call tested function
+        self.assertEqual(exporter.export(), (3, 0))
+
+        sources = Sources(self.connection)
+        source = sources.get_by_url("https://source0.com")
+        path = sources.get_file_name(source)
+        self.assertIn("&lt;One&gt;", path.read_text())
+        self.assertTrue(path.with_name(path.name + ".gz").exists())
+        self.assertTrue((System.get_object().get_export_dir() / "index_1.html").exists())
+
+    def test_export__incremental(self):
+        exporter = Exporter(self.table_name, workers=2)
+        exporter.export()
+
+        sources = Sources(self.connection)
+        source = sources.get_by_url("https://source0.com")
+        Entries(self.connection).add_many([{"link": "https://source0.com/2"}], source)
+        removed = sources.get_by_url("https://source1.com")
+        sources.delete(removed.id)
+
+        # call tested function
+        self.assertEqual(exporter.export(), (1, 1))
+
+        self.assertIn("https://source0.com/2", sources.get_file_name(source).read_text())
+        self.assertFalse(sources.get_file_name(removed).exists())
@@ -0,0 +1,111 @@
+import tempfile
+import unittest
+from pathlib import Path
+from sqlalchemy import event
+
+from src.dbconnection import DbConnection
+from src.controller import Controller
+from src.sources import Sources
+from src.sourcecache import SourceCache
+from src.entryrules import EntryRules
+from src.importqueue import ImportQueue, ImportJob
+from testdb import create_test_db
+
+
+class ImportQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+        self.controller = Controller(self.connection)
+        SourceCache.get_object().clear()
+
+    def tearDown(self):
+        EntryRules.invalidate(self.connection.db_file)
+        self.connection.close()
+        SourceCache.get_object().clear()
+        self.directory.cleanup()
+
+    def test_add(self):
+        queue = ImportQueue()
+
+        # call tested function
+        job = queue.add(["https://a.com", "https://b.com", "https://a.com", ""])
+
+        self.assertEqual(job.urls, ["https://a.com", "https://b.com"])
+        self.assertEqual(job.status, ImportJob.QUEUED)
+        self.assertEqual(queue.get_job(job.id), job)
+
+        self.assertEqual(queue.pop(), job)
+        self.assertIsNone(queue.pop())
+
+    def test_add__keeps_last_jobs(self):
+        queue = ImportQueue(max_jobs=2)
+
+        jobs = []
+        for index in range(3):
+            job = queue.add([f"https://{index}.com"])
+            job.set_done()
+            jobs.append(job)
+
+        # call tested function
+        queue.add(["https://new.com"])
+
+        self.assertIsNone(queue.get_job(jobs[0].id))
+        self.assertIsNone(queue.get_job(jobs[1].id))
+        self.assertIsNotNone(queue.get_job(jobs[2].id))
+
+    def test_add_many(self):
+        sources = Sources(self.connection)
+        existing_id = sources.set("https://existing.com")
+
+        statements = []
+        event.listen(self.connection.engine,
+                     "before_cursor_execute",
+                     lambda connection, cursor, statement, parameters, context, executemany: statements.append(statement))
+
+        # call tested function
+        source_ids = sources.add_many(["https://existing.com", "https://new1.com", "https://new2.com", "https://new1.com"])
+
+        self.assertEqual(len(statements), 1)
+
+        self.assertEqual(len(source_ids), 2)
+        self.assertNotIn(existing_id, source_ids)
+        self.assertEqual(sources.count(), 3)
+        self.assertEqual(sources.get(source_ids[0]).url, "https://new1.com")
+        self.assertEqual(sources.get(source_ids[1]).url, "https://new2.com")
+
+    def test_run_import(self):
+        Sources(self.connection).set("https://existing.com")
+        self.controller.add_entry_rules("blocked.com")
+
+        queue = ImportQueue(chunk_size=2)
+        ImportQueue.instance = queue
+        try:
+            job = self.controller.add_sources_text("https://existing.com\nhttps://blocked.com/feed\nhttps://new1.com\nhttps://new2.com\n")
+
+            # call tested function
+            source_ids = self.controller.run_import(job)
+        finally:
+            ImportQueue.instance = None
+
+        self.assertEqual(len(source_ids), 2)
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertEqual(job.total, 4)
+        self.assertEqual(job.processed, 4)
+        self.assertEqual(job.added, 2)
+        self.assertEqual(job.existing, 1)
+        self.assertEqual(job.blocked, 1)
+        self.assertEqual(job.to_json()["status"], "done")
+
+    def test_add_sources_text__keeps_order(self):
+        queue = ImportQueue()
+        ImportQueue.instance = queue
+        try:
+            # call tested function
+            job = self.controller.add_sources_text("https://c.com\nhttps://a.com\nhttps://c.com\nhttps://b.com\n")
+        finally:
+            ImportQueue.instance = None
+
+        self.assertEqual(job.urls, ["https://c.com", "https://a.com", "https://b.com"])
@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from pathlib import Path
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+
+from src.dbconnection import DbConnection
+from src.applogging import AppLogging
+from src.logs import Logs
+from testdb import create_test_db
+
+
+class LogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+
+        rows = []
+        for index in range(10):
+            rows.append({
+                "info_text": f"Message {index}",
+                "detail_text": "",
+                "level": AppLogging.ERROR if index % 2 else AppLogging.INFO,
+                "date": datetime(2024, 1, 1) + timedelta(hours=index),
+            })
+        table = self.connection.applogging.get_table()
+        self.connection.connection.execute(insert(table), rows)
+        self.connection.connection.commit()
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_search_page__cursor(self):
+        logs = Logs(self.connection)
+
+        first_page, cursor = logs.search_page(limit=4)
+
+        # call tested function
+        second_page, next_cursor = logs.search_page(limit=4, cursor=cursor)
+
+        self.assertEqual([log.info_text for log in first_page], [f"Message {index}" for index in range(9, 5, -1)])
+        self.assertEqual([log.info_text for log in second_page], [f"Message {index}" for index in range(5, 1, -1)])
+        self.assertIsNotNone(next_cursor)
+
+    def test_search__filters(self):
+        logs = Logs(self.connection)
+
+        # call tested function
+        rows = list(logs.search(level="error", date_from="2024-01-01T02:00:00", date_to="2024-01-01T08:00:00", text="message"))
+
+        self.assertEqual([log.info_text for log in rows], ["Message 7", "Message 5", "Message 3"])
@@ -0,0 +1,58 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.dbconnection import DbConnection
+from src.entries import Entries
+from src.sources import Sources
+from src.sourcecache import SourceCache
+from src.system import System
+from src.rsswriter import RssWriter
+from testdb import create_test_db, import_main
+
+
+class MainRssTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        System.get_object().export_dir = Path(self.directory.name) / "export"
+        SourceCache.get_object().clear()
+
+        self.connection = DbConnection(self.table_name)
+        self.sources = Sources(self.connection)
+
+        source_id = self.sources.set("https://source.com")
+        self.source = self.sources.get(source_id)
+        Entries(self.connection).add_many([{"link": f"https://source.com/{index}"} for index in range(2)], self.source)
+        RssWriter(self.connection, self.source).write()
+
+        self.client = import_main(self.table_name).app.test_client()
+
+    def tearDown(self):
+        self.connection.close()
+        SourceCache.get_object().clear()
+        self.directory.cleanup()
+
+    def get_stored_rss(self):
+        return gzip.decompress(self.sources.get_rss_file_name(self.source).read_bytes()).decode("utf-8")
+
+    def test_remove_entry__rewrites_rss(self):
+        entry = next(self.connection.entries_table.get_where({"link": "https://source.com/0"}))
+        self.assertIn("https://source.com/0", self.get_stored_rss())
+
+        # call tested function
+        self.client.get(f"/remove-entry?id={entry.id}")
+
+        self.assertNotIn("https://source.com/0", self.get_stored_rss())
+        self.assertIn("https://source.com/1", self.get_stored_rss())
+
+    def test_source_update__rewrites_rss(self):
+        path = self.sources.get_rss_file_name(self.source)
+        path.unlink()
+
+        # call tested function
+        self.client.post(f"/source/{self.source.id}", data={"fetch_period": "60", "xpath": ""})
+
+        self.assertIn("https://source.com/1", self.get_stored_rss())
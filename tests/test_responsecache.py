@@ -0,0 +1,118 @@
+import time
+import threading
+import unittest
+
+from src.responsecache import ResponseCache
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_get__cached(self):
+        cache = ResponseCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return b"body"
+
+        cache.get("key", compute)
+
+        # call tested function
+        body, etag = cache.get("key", compute)
+
+        self.assertEqual(body, b"body")
+        self.assertEqual(etag, ResponseCache.get_etag(b"body"))
+        self.assertEqual(len(calls), 1)
+
+    def test_get__bump(self):
+        cache = ResponseCache()
+        bodies = [b"first", b"second"]
+
+        first_body, first_etag = cache.get("key", lambda: bodies[0])
+        cache.bump()
+
+        # call tested function
+        body, etag = cache.get("key", lambda: bodies[1])
+
+        self.assertEqual(body, b"second")
+        self.assertNotEqual(etag, first_etag)
+
+    def test_get__coalesced(self):
+        cache = ResponseCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return b"body"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("key", compute))) for _ in range(5)]
+
+        # call tested function
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result[0] == b"body" for result in results))
+
+    def test_get__source_ids(self):
+        cache = ResponseCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return b"body"
+
+        cache.get("key", compute, source_ids=[1, 2])
+        cache.bump(3)
+        cache.get("key", compute, source_ids=[1, 2])
+        self.assertEqual(len(calls), 1)
+
+        cache.bump(2)
+
+        # call tested function
+        cache.get("key", compute, source_ids=[1, 2])
+
+        self.assertEqual(len(calls), 2)
+
+    def test_bump__max_source_versions(self):
+        cache = ResponseCache(max_source_versions=3)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return b"body"
+
+        cache.get("key", compute, source_ids=[1])
+
+        # call tested function
+        for source_id in range(2, 10):
+            cache.bump(source_id)
+
+        self.assertLessEqual(len(cache.source_versions), 3)
+
+        cache.get("key", compute, source_ids=[1])
+        self.assertEqual(len(calls), 2)
+
+    def test_remove(self):
+        cache = ResponseCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return b"body"
+
+        cache.bump(1)
+        cache.get("key", compute, source_ids=[1])
+
+        # call tested function
+        cache.remove(1)
+
+        self.assertNotIn(1, cache.source_versions)
+
+        cache.get("key", compute, source_ids=[1])
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from src.dbconnection import DbConnection
+from src.entries import Entries
+from src.sources import Sources
+from src.retention import Retention
+from testdb import create_test_db
+
+
+class RetentionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+
+        sources = Sources(self.connection)
+        self.source = sources.get(sources.set("https://source.com"))
+
+        now = datetime.now()
+        entry_jsons = []
+        for index in range(10):
+            entry_jsons.append({
+                "link": f"https://source.com/{index}",
+                "title": "Title",
+                "date_published": now - timedelta(days=index),
+                "bookmarked": index == 9,
+            })
+        Entries(self.connection).add_many(entry_jsons, self.source)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def get_links(self):
+        return sorted(entry.link for entry in self.connection.entries_table.get_where())
+
+    def test_run__expired(self):
+        retention = Retention(self.connection, chunk_size=2, pause_s=0)
+
+        # call tested function
+        report = retention.run()
+
+        # source keeps 5 days, bookmarked entry is kept
+        self.assertEqual(report["rows"], 4)
+        self.assertEqual(report["bytes"], 4 * (len("https://source.com/0") + len("Title")))
+        self.assertEqual(self.get_links(), [f"https://source.com/{index}" for index in [0, 1, 2, 3, 4, 9]])
+
+    def test_run__max_entries(self):
+        self.connection.sources_table.update_json_data(self.source.id, {"remove_after_days": 0})
+        retention = Retention(self.connection, chunk_size=2, pause_s=0)
+
+        # call tested function
+        report = retention.run(max_entries=3)
+
+        self.assertEqual(report["rows"], 7)
+        self.assertEqual(self.get_links(), [f"https://source.com/{index}" for index in [0, 1, 9]])
+
+    def test_run__max_entries__not_dated(self):
+        self.connection.sources_table.update_json_data(self.source.id, {"remove_after_days": 0})
+        Entries(self.connection).add_many([{"link": "https://source.com/new", "title": "Title"}], self.source)
+        retention = Retention(self.connection, chunk_size=2, pause_s=0)
+
+        # call tested function
+        retention.run(max_entries=3)
+
+        # entry without publish date was just created, it is not the oldest
+        self.assertEqual(self.get_links(), [f"https://source.com/{index}" for index in [0, 9, "new"]])
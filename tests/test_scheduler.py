@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from src.scheduler import SourceScheduler
+from src.dbconnection import DbConnection
+from src.sources import Sources
+from src.sourcedata import SourceData
+from testdb import create_test_db
+
+
+class SourceSchedulerTest(unittest.TestCase):
+
+    def test_pop_due(self):
+        scheduler = SourceScheduler()
+        now = datetime.now()
+
+        scheduler.schedule(1, now + timedelta(seconds=30))
+        scheduler.schedule(2, now - timedelta(seconds=30))
+        scheduler.schedule(3, now - timedelta(seconds=60))
+
+        # call tested function
+        self.assertEqual(scheduler.pop_due(now), [3, 2])
+        self.assertEqual(scheduler.pop_due(now), [])
+        self.assertEqual(scheduler.get_wait_time(now), timedelta(seconds=30))
+
+    def test_pop_due__limit(self):
+        scheduler = SourceScheduler()
+        now = datetime.now()
+
+        for source_id in range(5):
+            scheduler.schedule(source_id, now - timedelta(seconds=source_id))
+
+        # call tested function
+        self.assertEqual(scheduler.pop_due(now, limit=2), [4, 3])
+        self.assertEqual(scheduler.pop_due(now, limit=2), [2, 1])
+        self.assertEqual(scheduler.pop_due(now, limit=2), [0])
+
+    def test_pop_due__rescheduled(self):
+        scheduler = SourceScheduler()
+        now = datetime.now()
+
+        scheduler.schedule(1, now - timedelta(seconds=30))
+        scheduler.schedule(1, now + timedelta(seconds=30))
+
+        # call tested function
+        self.assertEqual(scheduler.pop_due(now), [])
+        self.assertEqual(scheduler.count(), 1)
+
+    def test_schedule_missing(self):
+        scheduler = SourceScheduler()
+        now = datetime.now()
+
+        scheduler.schedule(1, now + timedelta(seconds=30))
+
+        # call tested function
+        scheduler.schedule_missing([1, 2], now)
+
+        self.assertEqual(scheduler.pop_due(now), [2])
+        self.assertEqual(scheduler.count(), 1)
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            table_name = create_test_db(Path(directory) / "test.db")
+            connection = DbConnection(table_name)
+
+            sources = Sources(connection)
+            read_id = sources.set("https://read.com")
+            new_id = sources.set("https://new.com")
+
+            source = connection.sources_table.get(read_id)
+            SourceData(connection).mark_read(source)
+
+            scheduler = SourceScheduler()
+
+            # call tested function
+            scheduler.load(connection)
+
+            self.assertEqual(scheduler.pop_due(), [new_id])
+            self.assertGreater(scheduler.get_wait_time(), timedelta(minutes=59))
+
+            connection.close()
@@ -0,0 +1,22 @@
+import unittest
+import xml.dom.minidom
+
+from src.serializers import source_and_entries_to_rss_stream
+
+
+class SerializersTest(unittest.TestCase):
+
+    def test_source_and_entries_to_rss_stream(self):
+        source_json = {"title": "Tom & Jerry", "link": "https://source.com"}
+        entry_jsons = iter([
+            {"title": "<b>]]></b>", "link": "https://source.com/?a=1&b=2", "thumbnail": "https://source.com/\"x\".png"},
+        ])
+
+        # call tested function
+        rss_text = "".join(source_and_entries_to_rss_stream(source_json, entry_jsons))
+
+        document = xml.dom.minidom.parseString(rss_text)
+        titles = [node.firstChild.data for node in document.getElementsByTagName("title")]
+        self.assertEqual(titles, ["Tom & Jerry", "<b>]]></b>"])
+        links = [node.firstChild.data for node in document.getElementsByTagName("link")]
+        self.assertEqual(links, ["https://source.com", "https://source.com/?a=1&b=2"])
@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.dbconnection import DbConnection
+from src.sources import Sources
+from src.sourcedata import SourceData
+from testdb import create_test_db
+
+
+class SourceDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_cleanup(self):
+        sources = Sources(self.connection)
+        sourcedata = SourceData(self.connection)
+
+        source_ids = [sources.set(f"https://source{index}.com") for index in range(3)]
+        for source_id in source_ids:
+            sourcedata.mark_read(sources.get(source_id))
+        self.connection.sources_table.delete(id=source_ids[0])
+
+        # call tested function
+        self.assertEqual(sourcedata.cleanup(), 1)
+
+        rows = list(self.connection.sourceoperationaleata.get_where())
+        self.assertEqual(sorted(row.source_obj_id for row in rows), source_ids[1:])
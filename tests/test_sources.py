@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from pathlib import Path
+from sqlalchemy import event
+
+from src.dbconnection import DbConnection
+from src.entries import Entries
+from src.sources import Sources
+from src.sourcecache import SourceCache
+from testdb import create_test_db, import_main
+
+
+class SourcesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        self.connection = DbConnection(self.table_name)
+        SourceCache.get_object().clear()
+
+    def tearDown(self):
+        self.connection.close()
+        SourceCache.get_object().clear()
+        self.directory.cleanup()
+
+    def count_queries(self):
+        statements = []
+        event.listen(self.connection.engine,
+                     "before_cursor_execute",
+                     lambda connection, cursor, statement, parameters, context, executemany: statements.append(statement))
+        return statements
+
+    def test_get_many__entries_page(self):
+        sources = Sources(self.connection)
+        entries = Entries(self.connection)
+
+        for source_index in range(10):
+            source_id = sources.set(f"https://source{source_index}.com")
+            source = sources.get(source_id)
+            entries.add_many([{"link": f"https://source{source_index}.com/{index}"} for index in range(10)], source)
+
+        main = import_main(self.table_name)
+
+        SourceCache.get_object().clear()
+        statements = self.count_queries()
+
+        # call tested function
+        response = main.app.test_client().get("/api/entries")
+
+        json_entries = response.get_json()["entries"]
+
+        # page of entries, and sources of the page
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(len(json_entries), 100)
+        for json_entry in json_entries:
+            self.assertEqual(json_entry["source"]["link"], json_entry["source_url"])
+
+    def test_get__cached(self):
+        sources = Sources(self.connection)
+        source_id = sources.set("https://source.com")
+        sources.get(source_id)
+
+        statements = self.count_queries()
+
+        # call tested function
+        source = sources.get(source_id)
+
+        self.assertEqual(len(statements), 0)
+        self.assertEqual(source.url, "https://source.com")
+        self.assertEqual(sources.get_by_url("https://source.com").id, source_id)
+
+    def test_set__invalidates(self):
+        sources = Sources(self.connection)
+        source_id = sources.set("https://source.com")
+        self.assertEqual(sources.get(source_id).title, "")
+
+        # call tested function
+        sources.set("https://source.com", {"title": "Source"})
+
+        self.assertEqual(sources.get(source_id).title, "Source")
+
+    def test_delete__invalidates(self):
+        sources = Sources(self.connection)
+        source_id = sources.set("https://source.com")
+        sources.get(source_id)
+
+        # call tested function
+        sources.delete(source_id)
+
+        self.assertIsNone(sources.get(source_id))
+        self.assertIsNone(sources.get_by_url("https://source.com"))
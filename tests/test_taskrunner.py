@@ -1,6 +1,19 @@
 
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
 import unittest
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from webtoolkit.response import ResponseHeaders
+
 from src.taskrunner import TaskRunner
+from src.dbconnection import DbConnection
+from src.sources import Sources
+from src.system import System
+from testdb import create_test_db
 
 class Source():
     def __init__(self):
@@ -29,3 +42,298 @@ class TaskRunnerTest(unittest.TestCase):
 
         # call tested function
         self.assertFalse(runner.is_entry_ok(entry, source))
+
+
+class FakeResponse():
+    def __init__(self):
+        self.headers = ResponseHeaders(headers={})
+
+    def is_valid(self):
+        return True
+
+    def get_status_code(self):
+        return 200
+
+    def get_binary(self):
+        return FEED
+
+
+class FakeUrl():
+    def __init__(self, link, barrier=None):
+        self.link = link
+        self.barrier = barrier
+
+    def get_response(self):
+        if self.barrier:
+            # passes only when all fetches are in flight at the same time
+            self.barrier.wait(timeout=5)
+        return FakeResponse()
+
+    def get_properties(self):
+        return {"title": "Title " + self.link}
+
+    def get_entries(self):
+        return [{"link": self.link + "/entry", "title": "Entry"}]
+
+
+class FakeUrlRunner(TaskRunner):
+    barrier = None
+
+    def get_source_url(self, source):
+        return FakeUrl(source.url, self.barrier)
+
+
+class FailingReadRunner(FakeUrlRunner):
+    def read_sources(self, sources):
+        self.prepare_source(sources[0])
+        raise ValueError("Cannot read")
+
+
+class FailingUrlRunner(FakeUrlRunner):
+    def apply_response(self, source, url, response):
+        if source.url == "https://source0.com":
+            raise ValueError("Cannot apply")
+        super().apply_response(source, url, response)
+
+
+class FailingOnceRunner(TaskRunner):
+    failed = False
+
+    def filter_entries(self, entries, source):
+        if not self.failed:
+            self.failed = True
+            raise ValueError("Cannot write entries")
+        return super().filter_entries(entries, source)
+
+
+class CountingRunner(FakeUrlRunner):
+    in_flight = 0
+    max_in_flight = 0
+
+    def prepare_source(self, source):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return super().prepare_source(source)
+
+    def apply_response(self, source, url, response):
+        self.in_flight -= 1
+        super().apply_response(source, url, response)
+
+
+class TaskRunnerReadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        System.get_object().export_dir = Path(self.directory.name) / "export"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_sources__concurrent(self):
+        runner = FakeUrlRunner(self.table_name, workers=5)
+        runner.barrier = threading.Barrier(5)
+        runner.executor = ThreadPoolExecutor(max_workers=runner.workers)
+        runner.connection = DbConnection(self.table_name)
+
+        sources = Sources(runner.connection)
+        for index in range(5):
+            sources.set(f"https://source{index}.com")
+        source_list = list(runner.connection.sources_table.get_sources())
+
+        # call tested function
+        runner.read_sources(source_list)
+
+        self.assertFalse(runner.barrier.broken)
+        self.assertEqual(runner.connection.entries_table.count(), 5)
+        self.assertEqual(runner.connection.sourceoperationaleata.count(), 5)
+        for source in source_list:
+            self.assertTrue(sources.get_rss_file_name(source).exists())
+
+        runner.executor.shutdown()
+        runner.connection.close()
+
+    def test_read_sources__in_flight(self):
+        runner = CountingRunner(self.table_name, workers=2)
+        runner.executor = ThreadPoolExecutor(max_workers=runner.workers)
+        runner.connection = DbConnection(self.table_name)
+
+        sources = Sources(runner.connection)
+        for index in range(20):
+            sources.set(f"https://source{index}.com")
+        source_list = list(runner.connection.sources_table.get_sources())
+
+        # call tested function
+        runner.read_sources(source_list)
+
+        self.assertLessEqual(runner.max_in_flight, runner.get_max_in_flight())
+        self.assertEqual(runner.connection.entries_table.count(), 20)
+
+        runner.executor.shutdown()
+        runner.connection.close()
+
+    def test_read_sources__apply_error(self):
+        runner = FailingUrlRunner(self.table_name, workers=2)
+        runner.executor = ThreadPoolExecutor(max_workers=runner.workers)
+        runner.connection = DbConnection(self.table_name)
+
+        sources = Sources(runner.connection)
+        for index in range(3):
+            sources.set(f"https://source{index}.com")
+        source_list = list(runner.connection.sources_table.get_sources())
+
+        # call tested function
+        runner.read_sources(source_list)
+
+        self.assertEqual(runner.connection.entries_table.count(), 2)
+
+        runner.executor.shutdown()
+        runner.connection.close()
+
+    def test_process_due_sources__error(self):
+        runner = FailingReadRunner(self.table_name)
+        runner.connection = DbConnection(self.table_name)
+
+        sources = Sources(runner.connection)
+        source_ids = [sources.set(f"https://source{index}.com") for index in range(3)]
+        for source_id in source_ids:
+            runner.scheduler.schedule(source_id, datetime.now())
+        runner.connection.close()
+
+        # call tested function
+        with self.assertRaises(ValueError):
+            runner.process_due_sources()
+
+        # the prepared source is scheduled after its fetch period, the others right away
+        self.assertEqual(runner.scheduler.count(), 3)
+        self.assertEqual(sorted(runner.scheduler.pop_due()), source_ids[1:])
+
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+<title>Feed</title>
+<item><title>One</title><link>https://one.com/1</link><pubDate>Mon, 06 Sep 2021 16:45:00 +0000</pubDate></item>
+</channel>
+</rss>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        FeedHandler.requests.append(dict(self.headers))
+
+        if self.path == "/plain.xml":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.end_headers()
+            self.wfile.write(FEED)
+            return
+
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Last-Modified", "Mon, 06 Sep 2021 16:45:00 GMT")
+        self.end_headers()
+        self.wfile.write(FEED)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TaskRunnerConditionalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.table_name = create_test_db(Path(self.directory.name) / "test.db")
+        System.get_object().export_dir = Path(self.directory.name) / "export"
+
+        FeedHandler.requests = []
+        self.server = HTTPServer(("127.0.0.1", 0), FeedHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.feed_url = f"http://127.0.0.1:{self.server.server_port}/feed.xml"
+        self.plain_url = f"http://127.0.0.1:{self.server.server_port}/plain.xml"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_check_source__not_modified(self):
+        runner = TaskRunner(self.table_name)
+        runner.connection = DbConnection(self.table_name)
+
+        source_id = Sources(runner.connection).set(self.feed_url)
+        Sources(runner.connection).update(source_id, {"remove_after_days": 0})
+        source = runner.connection.sources_table.get(source_id)
+
+        runner.check_source(source)
+
+        self.assertEqual(runner.connection.entries_table.count(), 1)
+        entry = next(runner.connection.entries_table.get_where())
+        op_data = next(runner.connection.sourceoperationaleata.get_where())
+        self.assertEqual(op_data.etag, '"v1"')
+        self.assertEqual(op_data.last_modified, "Mon, 06 Sep 2021 16:45:00 GMT")
+
+        # call tested function
+        runner.check_source(source)
+
+        self.assertEqual(len(FeedHandler.requests), 2)
+        self.assertEqual(FeedHandler.requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(FeedHandler.requests[1]["If-Modified-Since"], "Mon, 06 Sep 2021 16:45:00 GMT")
+
+        # entry was not rewritten
+        self.assertEqual(next(runner.connection.entries_table.get_where()).id, entry.id)
+
+        runner.connection.close()
+
+    def test_check_source__body_not_changed(self):
+        runner = TaskRunner(self.table_name)
+        runner.connection = DbConnection(self.table_name)
+
+        source_id = Sources(runner.connection).set(self.plain_url)
+        Sources(runner.connection).update(source_id, {"remove_after_days": 0})
+        source = runner.connection.sources_table.get(source_id)
+
+        runner.check_source(source)
+        entry = next(runner.connection.entries_table.get_where())
+
+        # call tested function
+        runner.check_source(source)
+
+        self.assertEqual(len(FeedHandler.requests), 2)
+        self.assertNotIn("If-None-Match", FeedHandler.requests[1])
+
+        # entry was not rewritten
+        self.assertEqual(runner.connection.entries_table.count(), 1)
+        self.assertEqual(next(runner.connection.entries_table.get_where()).id, entry.id)
+
+        runner.connection.close()
+
+    def test_read_sources__ingestion_error(self):
+        runner = FailingOnceRunner(self.table_name, workers=1)
+        runner.executor = ThreadPoolExecutor(max_workers=runner.workers)
+        runner.connection = DbConnection(self.table_name)
+
+        source_id = Sources(runner.connection).set(self.feed_url)
+        Sources(runner.connection).update(source_id, {"remove_after_days": 0})
+        source = runner.connection.sources_table.get(source_id)
+
+        runner.read_sources([source])
+        self.assertEqual(runner.connection.entries_table.count(), 0)
+
+        # call tested function
+        runner.read_sources([source])
+
+        self.assertEqual(len(FeedHandler.requests), 2)
+        self.assertNotIn("If-None-Match", FeedHandler.requests[1])
+        self.assertEqual(runner.connection.entries_table.count(), 1)
+
+        runner.executor.shutdown()
+        runner.connection.close()
@@ -0,0 +1,29 @@
+import unittest
+from jinja2 import Environment, DictLoader
+
+from templates.templates import get_templates
+
+
+class TemplatesTest(unittest.TestCase):
+
+    def test_get_templates(self):
+        environment = Environment(loader=DictLoader(get_templates()), autoescape=True)
+
+        # call tested function
+        for template_name in environment.list_templates():
+            environment.get_template(template_name)
+
+        html_text = environment.get_template("sources.html").render(
+            title="<Sources>",
+            sources=[],
+            sources_length=0,
+            search_value="x",
+            pagination={"next": "?cursor=abc"})
+
+        self.assertIn("<title>&lt;Sources&gt;</title>", html_text)
+        self.assertIn('value="x"', html_text)
+        self.assertIn('href="?cursor=abc"', html_text)
+
+        html_text = environment.get_template("import.html").render(title="OK", job={"id": 7})
+
+        self.assertIn('<a href="/api/import/7">', html_text)
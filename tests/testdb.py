@@ -0,0 +1,139 @@
+"""
+Creates minimal database, with tables used by the reader.
+
+data/input.db is not a part of repository, therefore tests create their own.
+"""
+import os
+import sqlite3
+import importlib
+from pathlib import Path
+
+
+SCHEMA = """
+CREATE TABLE linkdatamodel (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    link VARCHAR(1000) NOT NULL,
+    title VARCHAR(1000),
+    description VARCHAR(1000),
+    thumbnail VARCHAR(1000),
+    language VARCHAR(10),
+    age INTEGER,
+    date_created DATETIME,
+    date_published DATETIME,
+    date_dead_since DATETIME,
+    date_update_last DATETIME,
+    date_last_modified DATETIME,
+    bookmarked BOOLEAN NOT NULL DEFAULT 0,
+    permanent BOOLEAN NOT NULL DEFAULT 0,
+    author VARCHAR(1000),
+    album VARCHAR(1000),
+    page_rating_contents INTEGER NOT NULL DEFAULT 0,
+    page_rating_votes INTEGER NOT NULL DEFAULT 0,
+    page_rating_visits INTEGER NOT NULL DEFAULT 0,
+    page_rating INTEGER NOT NULL DEFAULT 0,
+    status_code INTEGER NOT NULL DEFAULT 0,
+    manual_status_code INTEGER NOT NULL DEFAULT 0,
+    contents_type INTEGER NOT NULL DEFAULT 0,
+    source_url VARCHAR(2000),
+    source_id INTEGER
+);
+
+CREATE TABLE sourcedatamodel (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url VARCHAR(2000) NOT NULL,
+    enabled BOOLEAN NOT NULL DEFAULT 1,
+    source_type VARCHAR(1000),
+    title VARCHAR(1000),
+    category_name VARCHAR(1000),
+    subcategory_name VARCHAR(1000),
+    export_to_cms BOOLEAN NOT NULL DEFAULT 0,
+    remove_after_days INTEGER,
+    language VARCHAR(1000),
+    age INTEGER,
+    fetch_period INTEGER NOT NULL DEFAULT 0,
+    auto_tag VARCHAR(1000),
+    entries_backgroundcolor_alpha FLOAT,
+    entries_backgroundcolor VARCHAR(1000),
+    entries_alpha FLOAT,
+    proxy_location VARCHAR(1000),
+    auto_update_favicon BOOLEAN,
+    xpath VARCHAR(1000),
+    favicon VARCHAR(1000)
+);
+
+CREATE TABLE sourceoperationaldata (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date_fetched DATETIME,
+    import_seconds INTEGER,
+    number_of_entries INTEGER,
+    page_hash BLOB,
+    consecutive_errors INTEGER,
+    source_obj_id INTEGER
+);
+
+CREATE TABLE entryrules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enabled BOOLEAN,
+    priority INTEGER,
+    rule_name VARCHAR(1000),
+    trigger_rule_url VARCHAR(1000),
+    trigger_text VARCHAR(1000),
+    trigger_text_hits INTEGER,
+    trigger_text_fields VARCHAR(1000),
+    block BOOLEAN,
+    trust BOOLEAN,
+    auto_tag VARCHAR(1000),
+    apply_age_limit INTEGER,
+    browser_id INTEGER
+);
+
+CREATE TABLE configurationentry (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    instance_title VARCHAR(500),
+    instance_description VARCHAR(500),
+    display_type VARCHAR(500),
+    remote_webtools_server_location VARCHAR(500)
+);
+
+CREATE TABLE applogging (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    info_text VARCHAR(2000),
+    detail_text VARCHAR(2000),
+    level INTEGER NOT NULL DEFAULT 0,
+    date DATETIME
+);
+
+INSERT INTO configurationentry (instance_title, instance_description, display_type, remote_webtools_server_location)
+VALUES ('Test', '', 'standard', '');
+"""
+
+
+def create_test_db(path):
+    connection = sqlite3.connect(str(path))
+    connection.executescript(SCHEMA)
+    connection.commit()
+    connection.close()
+    return path
+
+
+def import_main(path):
+    """
+    Imports main, serving database at path.
+
+    On import main reads pyproject.toml, and data/table.db from working directory,
+    therefore it is imported from a directory prepared next to the database.
+    """
+    directory = Path(path).parent / "app"
+    (directory / "data").mkdir(parents=True, exist_ok=True)
+    (directory / "data" / "table.db").touch()
+    (directory / "pyproject.toml").write_text((Path(__file__).parent.parent / "pyproject.toml").read_text())
+
+    working_directory = os.getcwd()
+    os.chdir(directory)
+    try:
+        main = importlib.import_module("main")
+    finally:
+        os.chdir(working_directory)
+
+    main.table_name = Path(path)
+    return main